@@ -5,6 +5,8 @@ import random
 # TODO: Implement these classes.
 
 class MiniMax(Algorithm):
+    prune = False
+
     def next_move(self, packet: PlayPacket) -> MovePacket:
         print(packet)
         return MovePacket(
@@ -0,0 +1,95 @@
+from ..common import BitBoard, PlayPacket, LeanPlayPacket, DeltaPacket, MovePacket, MoveStatistics, JoinPacket, JoinResponsePacket, WinPacket, ViewPacket, ErrorPacket, PlayerType, Tile, tile_to_emoji
+from ..common.codec import JSON, MSGPACK, codecs, dumps, loads
+from ..client.search import SearchStatistics
+from .config import BenchConfig
+
+from typing import Callable, Dict, List, Tuple
+import json
+import random
+import time
+
+def sample_board(board_size: int) -> BitBoard:
+    board = BitBoard(board_size=board_size, line_up_size=min(board_size, 4), blocks=[(0, 0), (board_size - 1, board_size - 1)])
+    cells = [(x, y) for x, y in board.moves()]
+    random.Random(472).shuffle(cells)
+
+    for i, (x, y) in enumerate(cells[:len(cells) // 2]):
+        board.make(x, y, Tile(i % 2))
+
+    return board
+
+def sample_statistics() -> MoveStatistics:
+    statistics = SearchStatistics(compact=True)
+
+    for depth, count in ((1, 64), (2, 448)):
+        for _ in range(count):
+            statistics.record(depth, 1e-4)
+
+    return statistics.to_move_statistics()
+
+def sample_packets(board_size: int) -> Dict[str, any]:
+    board = sample_board(board_size)
+    order = [Tile.P1, Tile.P2]
+
+    return {
+        "play": PlayPacket(
+            tile=Tile.P1,
+            emoji_board=[[tile_to_emoji(tile) for tile in row] for row in board.to_tile_board()],
+            moves=board.history,
+            blocks=board.blocks,
+            order=order,
+            seq=len(board)
+        ),
+        "lean": LeanPlayPacket.from_board(board=board, tile=Tile.P1, order=order, seq=len(board)),
+        "delta": DeltaPacket(seq=len(board), tile=Tile.P2, order=order, move=(1, 2, Tile.P1)),
+        "move": MovePacket(move=(1, 2), statistics=sample_statistics()),
+        "join": JoinPacket(game_id="1", player_name="bench", player_type=PlayerType.AI, lean=True),
+        "joined": JoinResponsePacket(socket_id="bench", player_id=1, player_name="bench", player_type=PlayerType.AI, tile=Tile.P1, tile_emoji=tile_to_emoji(Tile.P1)),
+        "win": WinPacket(ranks={1: 1, 2: 2}),
+        "view": ViewPacket(game_id="1"),
+        "error": ErrorPacket(error="Not player turn.")
+    }
+
+def wire(packet: any, codec: str) -> any:
+    data = dumps(packet, codec)
+
+    return json.dumps(data) if codec == JSON else data
+
+def unwire(cls: type, data: any, codec: str) -> any:
+    return loads(cls, json.loads(data) if codec == JSON else data)
+
+def rate(iterations: int, f: Callable[[], any]) -> float:
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        f()
+
+    return iterations / (time.perf_counter() - start)
+
+def bench(config: BenchConfig) -> List[Tuple[str, str, int, float, float]]:
+    rows = []
+
+    for name, packet in sample_packets(config.board_size).items():
+        cls = type(packet)
+
+        for codec in codecs():
+            data = wire(packet, codec)
+
+            if unwire(cls, data, codec) != packet:
+                raise Exception(f"Codec {codec} does not round trip {name}.")
+
+            encode_rate = rate(config.iterations, lambda: wire(packet, codec))
+            decode_rate = rate(config.iterations, lambda: unwire(cls, data, codec))
+
+            rows.append((name, codec, len(data), encode_rate, decode_rate))
+
+    return rows
+
+def bench_main(config: BenchConfig):
+    if not MSGPACK in codecs():
+        print("msgpack not installed, only benchmarking json.")
+
+    print(f"{'packet':<8} {'codec':<8} {'bytes':>7} {'encode/s':>12} {'decode/s':>12}")
+
+    for name, codec, size, encode_rate, decode_rate in bench(config):
+        print(f"{name:<8} {codec:<8} {size:>7} {encode_rate:>12.0f} {decode_rate:>12.0f}")
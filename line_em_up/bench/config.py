@@ -0,0 +1,6 @@
+from dataclasses import dataclass
+
+@dataclass
+class BenchConfig:
+    iterations: int
+    board_size: int
@@ -1,7 +1,10 @@
 from .client import NetworkClient
-from .config import ClientConfig, PoolConfig
+from .config import ClientConfig, PoolConfig, BookConfig
+from .book import OpeningBook, build_book, write_book, book_name
 from typing import Union, Set
 import requests
+import os
+import os.path
 import urllib.parse
 import time
 import threading
@@ -53,7 +56,10 @@ class PoolThread(threading.Thread):
                     url=self.__config.url,
                     player_name=self.__config.player_name,
                     player_type=PlayerType.AI,
-                    game_id=game_id
+                    game_id=game_id,
+                    workers=self.__config.workers,
+                    book_dir=self.__config.book_dir,
+                    codec=self.__config.codec
                 ))
 
                 while not client.done:
@@ -73,4 +79,53 @@ def pool_main(config: PoolConfig):
         time.sleep(1)
 
     for thread in threads:
-        thread.join()
\ No newline at end of file
+        thread.join()
+
+def book_main(config: BookConfig):
+    from ..common import Parameters, BitBoard, AlgorithmType, HeuristicType, Tile
+    from ..ai import Heuristic1, Heuristic2
+
+    parameters = Parameters.from_dict({
+        "board_size": config.board_size,
+        "line_up_size": config.line_up_size,
+        "blocks": config.blocks,
+        "max_player_count": config.player_count,
+        "max_time": 0,
+        "algorithm": config.algorithm,
+        "depths": [config.depth] * config.player_count,
+        "heuristics": config.heuristics
+    })
+
+    if parameters.blocks is None:
+        raise Exception("Opening books need explicit block positions.")
+
+    board = BitBoard(
+        board_size=parameters.board_size,
+        line_up_size=parameters.line_up_size,
+        blocks=parameters.blocks,
+        player_count=parameters.max_player_count
+    )
+    order = [tile for tile in Tile if tile.value >= 0 and tile.value < parameters.max_player_count]
+
+    heuristic_types = {
+        HeuristicType.ONE: Heuristic1,
+        HeuristicType.TWO: Heuristic2
+    }
+    heuristics = {tile: heuristic_types[parameters.heuristics[tile.value]](tile=tile, parameters=parameters) for tile in order}
+
+    entries = build_book(
+        board=board,
+        order=order,
+        heuristics=heuristics.get,
+        depth=config.depth if config.depth > 0 else parameters.board_size ** 2,
+        plies=config.plies,
+        prune=parameters.algorithm == AlgorithmType.ALPHABETA
+    )
+
+    if not os.path.exists(config.book_dir):
+        os.makedirs(config.book_dir)
+
+    path = os.path.join(config.book_dir, book_name(board))
+    write_book(path=path, board=board, entries=entries)
+
+    print(f"Wrote {len(entries)} positions to {path}")
@@ -1,7 +1,15 @@
 from abc import ABC, abstractmethod
-from ..common import PlayPacket, Move, Parameters, Tile
+from typing import List, Tuple, Union
+import numpy as np
+from ..common import PlayPacket, MovePacket, Move, Parameters, Tile, BitBoard, LineTable, SearchTimeout, get_line_table
+from .transposition import TranspositionTable
+from .search import Deadline, Search, SearchStatistics, WIN_SCORE
+from .parallel import ParallelSearch
+from .batch import window_counts
+from .book import find_opening_book
 
 class Heuristic(ABC):
+    batched: bool = False
     __tile: Tile
     __parameters: Parameters
 
@@ -13,6 +21,28 @@ class Heuristic(ABC):
     def get_score(self, data: any) -> float:
         return 0
 
+    def get_window_scores(self, own: np.ndarray, other: np.ndarray, blocked: np.ndarray) -> np.ndarray:
+        open_windows = blocked == 0
+
+        return (own ** 2) * (open_windows & (other == 0)) - (other ** 2) * (open_windows & (own == 0))
+
+    def get_board_score(self, board: BitBoard) -> float:
+        own_bits = board.bits(self.tile)
+        block_bits = board.bits(Tile.BLOCK)
+        other_bits = board.occupied & ~own_bits & ~block_bits
+        masks = self.lines.masks
+
+        own = np.array([bin(mask & own_bits).count("1") for mask in masks])
+        other = np.array([bin(mask & other_bits).count("1") for mask in masks])
+        blocked = np.array([bin(mask & block_bits).count("1") for mask in masks])
+
+        return float(self.get_window_scores(own, other, blocked).sum())
+
+    def get_scores(self, boards: np.ndarray) -> np.ndarray:
+        own, other, blocked = window_counts(boards, self.lines, self.tile)
+
+        return self.get_window_scores(own, other, blocked).sum(axis=1).astype(float)
+
     @property
     def tile(self) -> Tile:
         return self.__tile
@@ -37,19 +67,153 @@ class Heuristic(ABC):
     def board_size(self) -> int:
         return self.__parameters.board_size
 
+    @property
+    def player_count(self) -> int:
+        return self.__parameters.max_player_count
+
+    @property
+    def lines(self) -> LineTable:
+        return get_line_table(self.board_size, self.line_up_size)
+
 class Algorithm(ABC):
+    prune: bool = True
     __heuristic: Heuristic
-
-    def __init__(self, heuristic: Heuristic):
+    __transposition_table: TranspositionTable
+    __time_margin: float
+    __workers: int
+    __parallel: ParallelSearch
+    __book_dir: str
+    __compact_statistics: bool
+
+    def __init__(self, heuristic: Heuristic, table_size: int = 2 ** 16, time_margin: float = 0.5, workers: int = 1, book_dir: str = None, compact_statistics: bool = True):
         self.__heuristic = heuristic
+        self.__transposition_table = TranspositionTable(size=table_size)
+        self.__time_margin = time_margin
+        self.__workers = workers
+        self.__parallel = None
+        self.__book_dir = book_dir
+        self.__compact_statistics = compact_statistics
+
+        if workers > 1:
+            self.__parallel = ParallelSearch(
+                workers=workers,
+                heuristic=heuristic,
+                table_size=self.__transposition_table.size,
+                prune=self.prune
+            )
 
     @abstractmethod
     def next_move(self, packet: PlayPacket) -> Move:
         return (0, 0)
 
+    def search(self, board: BitBoard, order: List[Tile], depth: int, deadline: Deadline, statistics: SearchStatistics) -> Tuple[float, Union[Move, None]]:
+        search = Search(
+            board=board,
+            heuristic=self.__heuristic,
+            order=order,
+            deadline=deadline,
+            statistics=statistics,
+            table=self.__transposition_table,
+            prune=self.prune
+        )
+
+        if self.__parallel is not None and depth > 1:
+            return self.__parallel.search(search=search, depth=depth)
+
+        return search.search(tile=self.tile, depth=depth)
+
+    @property
+    def parallel(self) -> ParallelSearch:
+        return self.__parallel
+
+    def close(self):
+        if self.__parallel is not None:
+            self.__parallel.close()
+            self.__parallel = None
+
+    def get_deadline(self) -> Deadline:
+        return Deadline(max(self.max_time - self.__time_margin, 0))
+
+    def book_move(self, board: BitBoard, order: List[Tile]) -> Union[Move, None]:
+        if len(order) != self.player_count:
+            return None
+
+        book = find_opening_book(self.__book_dir, board)
+
+        if book is None or not book.matches(board):
+            return None
+
+        entry = book.lookup(board, self.tile)
+
+        if entry is None or not board.is_empty(*entry[0]):
+            return None
+
+        return entry[0]
+
+    def iterative_deepening(self, packet: PlayPacket) -> MovePacket:
+        deadline = self.get_deadline()
+        board = self.get_board(packet)
+        statistics = SearchStatistics(compact=self.__compact_statistics)
+
+        move = self.book_move(board, packet.order)
+        if move is not None:
+            return MovePacket(
+                move=move,
+                statistics=statistics.to_move_statistics()
+            )
+
+        best_move = next(board.moves(), (0, 0))
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self.search(board.copy(), packet.order, depth, deadline, statistics)
+            except SearchTimeout:
+                break
+
+            if move is not None:
+                best_move = move
+
+            if abs(score) >= WIN_SCORE - depth or deadline.expired:
+                break
+
+        return MovePacket(
+            move=best_move,
+            statistics=statistics.to_move_statistics()
+        )
+
     def get_score(self, data: any) -> float:
         return self.__heuristic.get_score(data)
 
+    def get_scores(self, boards: np.ndarray) -> np.ndarray:
+        return self.__heuristic.get_scores(boards)
+
+    def get_board(self, packet: PlayPacket) -> BitBoard:
+        return packet.to_bitboard(
+            board_size=self.board_size,
+            line_up_size=self.line_up_size,
+            player_count=self.player_count
+        )
+
+    @property
+    def transposition_table(self) -> TranspositionTable:
+        return self.__transposition_table
+
+    @property
+    def time_margin(self) -> float:
+        return self.__time_margin
+
+    @property
+    def workers(self) -> int:
+        return self.__workers
+
+    @property
+    def book_dir(self) -> str:
+        return self.__book_dir
+
+    @property
+    def compact_statistics(self) -> bool:
+        return self.__compact_statistics
+
     @property
     def tile(self) -> Tile:
         return self.__heuristic.tile
@@ -73,3 +237,11 @@ class Algorithm(ABC):
     @property
     def board_size(self) -> int:
         return self.__heuristic.board_size
+
+    @property
+    def player_count(self) -> int:
+        return self.__heuristic.player_count
+
+    @property
+    def lines(self) -> LineTable:
+        return self.__heuristic.lines
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+
+from ..common import BitBoard, LineTable, Tile, get_line_table
+
+def board_to_array(board: BitBoard) -> np.ndarray:
+    array = np.full(board.board_size ** 2, Tile.EMPTY.value, dtype=np.int8)
+
+    for tile in Tile:
+        if tile == Tile.EMPTY:
+            continue
+
+        bits = board.bits(tile)
+        while bits:
+            low = bits & -bits
+            array[low.bit_length() - 1] = tile.value
+            bits ^= low
+
+    return array
+
+@lru_cache(maxsize=None)
+def _window_indices(board_size: int, line_up_size: int) -> np.ndarray:
+    lines = get_line_table(board_size, line_up_size)
+
+    return np.array(lines.indices, dtype=np.intp).reshape(len(lines), line_up_size)
+
+def window_indices(lines: LineTable) -> np.ndarray:
+    return _window_indices(lines.board_size, lines.line_up_size)
+
+def window_counts(boards: np.ndarray, lines: LineTable, tile: Tile) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    windows = boards[:, window_indices(lines)]
+
+    own = (windows == tile.value).sum(axis=-1)
+    empty = (windows == Tile.EMPTY.value).sum(axis=-1)
+    blocked = (windows == Tile.BLOCK.value).sum(axis=-1)
+    other = lines.line_up_size - own - empty - blocked
+
+    return own, other, blocked
@@ -0,0 +1,185 @@
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Union
+import mmap
+import os.path
+import struct
+
+from ..common import BitBoard, LEMException, Move, Tile
+from .search import Deadline, Search, SearchStatistics
+from .transposition import TranspositionTable
+
+BOOK_MAGIC = b"LEMB"
+BOOK_VERSION = 1
+HEADER = struct.Struct("<4sHHHHII")
+RECORD = struct.Struct("<QHHf")
+USED = 1
+
+def book_name(board: BitBoard) -> str:
+    return f"{board.board_size}-{board.line_up_size}-{board.keys.player_count}-{board.bits(Tile.BLOCK):x}.book"
+
+def book_key(board: BitBoard, tile: Tile) -> Tuple[int, int]:
+    key, transform = board.canonical_hash()
+
+    return key ^ board.keys.turn_key(tile), transform
+
+class OpeningBook:
+    __path: str
+    __handle: any
+    __map: mmap.mmap
+    __capacity: int
+    __offset: int
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__handle = None
+        self.__map = None
+        self.__capacity = 0
+        self.__offset = 0
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def __load(self):
+        if self.__map is not None:
+            return
+
+        self.__handle = open(self.__path, "rb")
+        self.__map = mmap.mmap(self.__handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, _, _, capacity, block_size = HEADER.unpack_from(self.__map, 0)
+
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            raise LEMException("Invalid opening book.")
+
+        self.__capacity = capacity
+        self.__offset = _table_offset(block_size)
+
+    def matches(self, board: BitBoard) -> bool:
+        self.__load()
+
+        _, _, board_size, line_up_size, player_count, _, block_size = HEADER.unpack_from(self.__map, 0)
+        blocks = int.from_bytes(self.__map[HEADER.size:HEADER.size + block_size], "little")
+
+        return board_size == board.board_size and line_up_size == board.line_up_size and player_count == board.keys.player_count and blocks == board.bits(Tile.BLOCK)
+
+    def lookup(self, board: BitBoard, tile: Tile) -> Union[Tuple[Move, float], None]:
+        self.__load()
+
+        key, transform = book_key(board, tile)
+        mask = self.__capacity - 1
+        slot = key & mask
+
+        for _ in range(self.__capacity):
+            record_key, index, flags, score = RECORD.unpack_from(self.__map, self.__offset + slot * RECORD.size)
+
+            if not flags & USED:
+                return None
+
+            if record_key == key:
+                move = (index % board.board_size, index // board.board_size)
+                return board.symmetry.from_canonical(move, transform), score
+
+            slot = (slot + 1) & mask
+
+        return None
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+            self.__handle.close()
+            self.__map = None
+            self.__handle = None
+
+    def __getstate__(self):
+        return {"path": self.__path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __repr__(self):
+        return f"OpeningBook(path={self.__path})"
+
+@lru_cache(maxsize=None)
+def get_opening_book(path: str) -> OpeningBook:
+    return OpeningBook(path=path)
+
+def find_opening_book(book_dir: str, board: BitBoard) -> Union[OpeningBook, None]:
+    if not book_dir:
+        return None
+
+    path = os.path.abspath(os.path.join(book_dir, book_name(board)))
+
+    if not os.path.exists(path):
+        return None
+
+    return get_opening_book(path)
+
+def _table_offset(block_size: int) -> int:
+    return (HEADER.size + block_size + 7) // 8 * 8
+
+def write_book(path: str, board: BitBoard, entries: Dict[int, Tuple[Move, float]]):
+    capacity = 1
+    while capacity < len(entries) * 2:
+        capacity *= 2
+
+    blocks = board.bits(Tile.BLOCK)
+    block_bytes = blocks.to_bytes((board.board_size ** 2 + 7) // 8, "little")
+    offset = _table_offset(len(block_bytes))
+
+    data = bytearray(offset + capacity * RECORD.size)
+    HEADER.pack_into(data, 0, BOOK_MAGIC, BOOK_VERSION, board.board_size, board.line_up_size, board.keys.player_count, capacity, len(block_bytes))
+    data[HEADER.size:HEADER.size + len(block_bytes)] = block_bytes
+
+    for key, ((x, y), score) in entries.items():
+        slot = key & (capacity - 1)
+
+        while RECORD.unpack_from(data, offset + slot * RECORD.size)[2] & USED:
+            slot = (slot + 1) & (capacity - 1)
+
+        RECORD.pack_into(data, offset + slot * RECORD.size, key, y * board.board_size + x, USED, score)
+
+    with open(path, "wb") as h:
+        h.write(data)
+
+def build_book(board: BitBoard, order: List[Tile], heuristics: Callable[[Tile], any], depth: int, plies: int, table_size: int = 2 ** 20, prune: bool = True) -> Dict[int, Tuple[Move, float]]:
+    tables = {tile: TranspositionTable(size=table_size) for tile in order}
+    entries = {}
+
+    def visit(tile: Tile, ply: int):
+        key, transform = book_key(board, tile)
+
+        if key in entries or board.is_full:
+            return
+
+        search = Search(
+            board=board,
+            heuristic=heuristics(tile),
+            order=order,
+            deadline=Deadline(float("inf")),
+            statistics=SearchStatistics(),
+            table=tables[tile],
+            prune=prune
+        )
+        score, move = search.search(tile=tile, depth=depth)
+
+        if move is None:
+            return
+
+        entries[key] = (board.symmetry.to_canonical(move, transform), score)
+
+        if ply + 1 >= plies:
+            return
+
+        next_tile = order[(order.index(tile) + 1) % len(order)]
+        for x, y in list(board.moves()):
+            board.make(x, y, tile)
+
+            if not board.is_win(tile, x, y):
+                visit(next_tile, ply + 1)
+
+            board.unmake()
+
+    visit(order[0], 0)
+
+    return entries
@@ -1,4 +1,5 @@
-from ..common import Parameters, PlayPacket, MovePacket, ViewPacket, JoinPacket, JoinResponsePacket, AlgorithmType, WinPacket, PlayerType, Tile, HeuristicType
+from ..common import Parameters, PlayPacket, LeanPlayPacket, DeltaPacket, MovePacket, ViewPacket, JoinPacket, JoinResponsePacket, AlgorithmType, WinPacket, PlayerType, Tile, HeuristicType
+from ..common.codec import JSON, dumps, loads
 from .config import ClientConfig
 from .players import Player, HumanPlayer, AIPlayer
 from ..ai import MiniMax, AlphaBeta, Heuristic1, Heuristic2
@@ -11,6 +12,8 @@ class Client(ABC):
     _config: ClientConfig
     _done: bool
     _player: Player
+    _state: PlayPacket
+    _codec: str
     _tile: Tile
     _done: bool
     _id: int
@@ -20,6 +23,8 @@ class Client(ABC):
         self._parameters = None
         self._done = False
         self._player = None
+        self._state = None
+        self._codec = JSON
         self._tile = Tile.EMPTY
         self._id = 0
 
@@ -49,7 +54,12 @@ class Client(ABC):
             }
             if self._parameters.algorithm in algorithm_types:
                 algorithm = algorithm_types[self._parameters.algorithm](
-                    heuristic=heuristic
+                    heuristic=heuristic,
+                    table_size=self._config.table_size,
+                    time_margin=self._config.time_margin,
+                    workers=self._config.workers,
+                    book_dir=self._config.book_dir,
+                    compact_statistics=self._config.compact_statistics
                 )
             else:
                 raise Exception(f"Unknown algorithm.")
@@ -64,6 +74,10 @@ class Client(ABC):
     def done(self):
         return self._done
 
+    @property
+    def lean(self) -> bool:
+        return self._config.player_type == PlayerType.AI
+
     @abstractmethod
     def run(self):
         pass
@@ -71,6 +85,10 @@ class Client(ABC):
     def next_move(self, packet: PlayPacket) -> MovePacket:
         return self._player.next_move(packet)
 
+    def close(self):
+        if self._player:
+            self._player.close()
+
 class NetworkClient(Client):
     def run(self):
         sio = socketio.Client()
@@ -94,47 +112,89 @@ class NetworkClient(Client):
             join_packet = JoinPacket(
                 player_name=self._config.player_name,
                 player_type=self._config.player_type,
-                game_id=self._config.game_id
+                game_id=self._config.game_id,
+                lean=self.lean,
+                codec=self._config.codec
             )
 
             sio.emit("join", join_packet.to_dict())
 
         @sio.event
         def join(data):
-            packet = JoinResponsePacket.from_dict(data)
+            packet = loads(JoinResponsePacket, data)
 
             if packet.player_name == self._config.player_name:
                 print("I Joined")
 
+                self._codec = packet.codec
                 self._id = packet.player_id
                 self._tile = packet.tile
                 self.init_player()
             else:
                 print("Opponent Joined")
 
-        @sio.event
-        def play(data):
-            packet = PlayPacket.from_dict(data)
-
+        def take_turn(packet: PlayPacket):
             if packet.tile == self._tile:
                 print("My Turn")
                 next_packet = self.next_move(packet)
-                sio.emit("play", next_packet.to_dict())
+                sio.emit("play", dumps(next_packet, self._codec))
             else:
                 print("Opponent's Turn")
 
+        def request_snapshot():
+            packet = ViewPacket(
+                game_id=self._config.game_id,
+                lean=self.lean,
+                codec=self._codec
+            )
+
+            sio.emit("snapshot", packet.to_dict())
+
+        @sio.event
+        def play(data):
+            if self.lean:
+                packet = loads(LeanPlayPacket, data).to_play_packet(self._parameters.board_size)
+            else:
+                packet = loads(PlayPacket, data)
+
+            if self._state is not None and packet.seq <= self._state.seq:
+                return
+
+            self._state = packet
+            take_turn(packet)
+
+        @sio.event
+        def delta(data):
+            packet = loads(DeltaPacket, data)
+
+            if self._state is None:
+                request_snapshot()
+                return
+
+            if packet.seq <= self._state.seq:
+                return
+
+            if not self._state.apply(packet):
+                print("Resyncing")
+                request_snapshot()
+                return
+
+            take_turn(self._state)
+
         @sio.event
         def win(data):
-            packet = WinPacket.from_dict(data)
+            packet = loads(WinPacket, data)
 
             print(f"I Ranked {packet.ranks[self._id]}")
 
+            self.close()
             self._done = True
             sio.disconnect()
 
         @sio.event
         def error(data):
             print(data["error"])
+            self.close()
             self._done = True
             sio.disconnect()
 
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from dataclasses_json import dataclass_json
+from typing import List
 from ..common import PlayerUUID, PlayerType, GameUUID
 
 @dataclass_json
@@ -9,6 +10,12 @@ class ClientConfig:
     player_name: PlayerUUID
     player_type: PlayerType
     game_id: GameUUID
+    table_size: int = 2 ** 16
+    time_margin: float = 0.5
+    workers: int = 1
+    book_dir: str = None
+    compact_statistics: bool = True
+    codec: str = "json"
 
 @dataclass_json
 @dataclass
@@ -16,3 +23,19 @@ class PoolConfig:
     url: str
     player_name: PlayerUUID
     pool_count: int
+    workers: int = 1
+    book_dir: str = None
+    codec: str = "json"
+
+@dataclass_json
+@dataclass
+class BookConfig:
+    board_size: int
+    line_up_size: int
+    blocks: str
+    player_count: int
+    heuristics: List[str]
+    algorithm: str
+    depth: int
+    plies: int
+    book_dir: str
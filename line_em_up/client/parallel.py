@@ -0,0 +1,212 @@
+from typing import List, Tuple, Union
+import multiprocessing
+import queue
+
+from ..common import BitBoard, LEMException, Move, SearchTimeout, Tile
+from ..common.packets import pack_move, unpack_move
+from .search import Deadline, Search, SearchStatistics
+from .transposition import TranspositionTable, Bound
+
+RESULT_GRACE = 5
+STARTUP_TIMEOUT = 60
+READY = "ready"
+
+Position = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...], bool]
+
+def _load_position(heuristic: any, position: Position) -> Tuple[BitBoard, List[Tile], bool]:
+    moves, blocks, order, compact = position
+    board = BitBoard(
+        board_size=heuristic.board_size,
+        line_up_size=heuristic.line_up_size,
+        blocks=[(index % heuristic.board_size, index // heuristic.board_size) for index in blocks],
+        player_count=heuristic.player_count
+    )
+
+    for move in moves:
+        index, tile = unpack_move(move)
+        board.make(*board.coordinate(index), tile)
+
+    return board, [Tile(tile) for tile in order], compact
+
+def _search_moves(search: Search, depth: int, moves: List[Move], alpha: float) -> Tuple[List[Tuple[Move, float]], bool]:
+    results = []
+
+    for move in moves:
+        try:
+            score = search.score_move(move, search.heuristic.tile, depth, 0, alpha, float("inf"))
+        except SearchTimeout:
+            return results, True
+
+        results.append((move, score))
+
+    return results, False
+
+def _worker_main(tasks: multiprocessing.Queue, results: multiprocessing.Queue, heuristic: any, table_size: int, prune: bool):
+    table = TranspositionTable(size=table_size)
+    version = None
+    board, order, compact = None, None, True
+    results.put(READY)
+
+    while True:
+        message = tasks.get()
+
+        if message is None:
+            return
+
+        if message[0] == "position":
+            _, version, position = message
+            board, order, compact = _load_position(heuristic, position)
+            continue
+
+        _, depth, moves, alpha, end_time = message
+
+        try:
+            statistics = SearchStatistics(compact=compact)
+            search = Search(
+                board=board,
+                heuristic=heuristic,
+                order=order,
+                deadline=Deadline.until(end_time),
+                statistics=statistics,
+                table=table,
+                prune=prune
+            )
+            scores, expired = _search_moves(search, depth, moves, alpha)
+            results.put((version, depth, scores, statistics, expired))
+        except Exception as err:
+            results.put((version, depth, err, None, True))
+
+class ParallelSearch:
+    __workers: int
+    __processes: List[multiprocessing.Process]
+    __tasks: List[multiprocessing.Queue]
+    __results: multiprocessing.Queue
+    __position: Position
+    __version: int
+
+    def __init__(self, workers: int, heuristic: any, table_size: int, prune: bool):
+        context = multiprocessing.get_context("spawn")
+
+        self.__workers = workers
+        self.__tasks = [context.Queue() for _ in range(workers)]
+        self.__results = context.Queue()
+        self.__position = None
+        self.__version = 0
+        self.__processes = [
+            context.Process(target=_worker_main, args=(tasks, self.__results, heuristic, table_size, prune), daemon=True)
+            for tasks in self.__tasks
+        ]
+
+        for process in self.__processes:
+            process.start()
+
+        for _ in self.__processes:
+            try:
+                self.__results.get(timeout=STARTUP_TIMEOUT)
+            except queue.Empty:
+                self.close()
+                raise LEMException("Search workers did not start.")
+
+    @property
+    def workers(self) -> int:
+        return self.__workers
+
+    def set_position(self, board: BitBoard, order: List[Tile], compact: bool):
+        position = (
+            tuple(pack_move(index, tile) for index, tile in board.placements),
+            tuple(board.index(x, y) for x, y in board.blocks),
+            tuple(tile.value for tile in order),
+            compact
+        )
+
+        if position == self.__position:
+            return
+
+        self.__position = position
+        self.__version += 1
+
+        for tasks in self.__tasks:
+            tasks.put(("position", self.__version, position))
+
+    def __collect(self, depth: int, count: int, timeout: float) -> Tuple[dict, List[SearchStatistics], bool]:
+        scores = {}
+        statistics = []
+        timed_out = False
+
+        while count > 0:
+            try:
+                version, result_depth, results, result_statistics, expired = self.__results.get(timeout=timeout)
+            except queue.Empty:
+                raise SearchTimeout("Search workers did not answer before the deadline.")
+
+            if version != self.__version or result_depth != depth:
+                continue
+
+            count -= 1
+
+            if isinstance(results, Exception):
+                raise results
+
+            scores.update(results)
+            statistics.append(result_statistics)
+            timed_out = timed_out or expired
+
+        return scores, statistics, timed_out
+
+    def search(self, search: Search, depth: int) -> Tuple[float, Union[Move, None]]:
+        tile = search.heuristic.tile
+        moves = list(search.board.moves())
+
+        if len(moves) == 0:
+            return 0, None
+
+        key, transform = search.table_key(tile)
+        if search.table is not None:
+            _, table_move = search.probe(key, transform, depth, -float("inf"), float("inf"))
+
+            if table_move in moves:
+                moves.remove(table_move)
+                moves.insert(0, table_move)
+
+        self.set_position(search.board, search.order, search.statistics.compact)
+
+        # Young brothers wait: the eldest root move is searched here first so its score can bound the rest.
+        alpha = -float("inf")
+        best_move = None
+        if search.prune:
+            best_move = moves.pop(0)
+            alpha = search.score_move(best_move, tile, depth, 0, alpha, float("inf"))
+
+        best_score = alpha
+        end_time = search.deadline.end_time
+        chunks = [chunk for chunk in (moves[i::self.__workers] for i in range(self.__workers)) if len(chunk) > 0]
+
+        for tasks, chunk in zip(self.__tasks, chunks):
+            tasks.put(("search", depth, chunk, alpha, end_time))
+
+        scores, statistics, timed_out = self.__collect(depth, len(chunks), max(search.deadline.remaining, 0) + RESULT_GRACE)
+
+        for worker_statistics in statistics:
+            search.statistics.merge(worker_statistics)
+
+        if timed_out:
+            raise SearchTimeout("Search deadline reached.")
+
+        for move in moves:
+            if best_move is None or scores[move] > best_score:
+                best_score, best_move = scores[move], move
+
+        if search.table is not None:
+            search.store(key, transform, depth, best_score, Bound.EXACT, best_move)
+
+        return best_score, best_move
+
+    def close(self):
+        for tasks in self.__tasks:
+            tasks.put(None)
+
+        for process in self.__processes:
+            process.join(timeout=1)
+
+            if process.is_alive():
+                process.terminate()
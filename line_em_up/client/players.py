@@ -10,6 +10,9 @@ class Player(ABC):
             move=(0, 0)
         )
 
+    def close(self):
+        pass
+
 class AIPlayer(Player):
     __algorithm: Algorithm
     
@@ -19,6 +22,9 @@ class AIPlayer(Player):
     def next_move(self, packet: PlayPacket) -> MovePacket:
         return self.__algorithm.next_move(packet)
 
+    def close(self):
+        self.__algorithm.close()
+
 class HumanPlayer(Player):
     def next_move(self, packet: PlayPacket) -> MovePacket:
         try:
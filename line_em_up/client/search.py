@@ -0,0 +1,291 @@
+from typing import List, Tuple, Union
+import numpy as np
+import time
+
+from ..common import BitBoard, Move, MoveStatistics, SearchTimeout, Symmetry, Tile
+from ..common.packets import NODE_TIME_BUCKETS, node_time_bucket
+from .transposition import TranspositionTable, Bound
+from .batch import board_to_array
+
+WIN_SCORE = 1e9
+
+class Deadline:
+    __slots__ = ("end", "interval", "_count")
+
+    def __init__(self, seconds: float, interval: int = 64):
+        self.end = time.perf_counter() + seconds
+        self.interval = interval
+        self._count = 0
+
+    @classmethod
+    def until(cls, end_time: float, interval: int = 64) -> "Deadline":
+        return cls(end_time - time.time(), interval)
+
+    @property
+    def remaining(self) -> float:
+        return self.end - time.perf_counter()
+
+    @property
+    def end_time(self) -> float:
+        return time.time() + self.remaining
+
+    @property
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.end
+
+    def check(self):
+        self._count += 1
+
+        if self._count >= self.interval:
+            self._count = 0
+
+            if time.perf_counter() >= self.end:
+                raise SearchTimeout("Search deadline reached.")
+
+class SearchStatistics:
+    compact: bool
+    node_times: List[float]
+    depth_counts: List[int]
+    node_count: int
+    node_time_total: float
+    node_time_min: float
+    node_time_max: float
+    node_time_histogram: List[int]
+
+    def __init__(self, compact: bool = True):
+        self.compact = compact
+        self.node_times = []
+        self.depth_counts = []
+        self.node_count = 0
+        self.node_time_total = 0
+        self.node_time_min = None
+        self.node_time_max = None
+        self.node_time_histogram = [0] * (len(NODE_TIME_BUCKETS) + 1)
+
+    def _record_time(self, elapsed: float):
+        if self.compact:
+            self.node_count += 1
+            self.node_time_total += elapsed
+            self.node_time_histogram[node_time_bucket(elapsed)] += 1
+
+            if self.node_time_min is None or elapsed < self.node_time_min:
+                self.node_time_min = elapsed
+            if self.node_time_max is None or elapsed > self.node_time_max:
+                self.node_time_max = elapsed
+        else:
+            self.node_times.append(elapsed)
+
+    def record(self, depth: int, elapsed: float):
+        self._record_time(elapsed)
+
+        while len(self.depth_counts) < depth:
+            self.depth_counts.append(0)
+        self.depth_counts[depth - 1] += 1
+
+    def merge(self, other: "SearchStatistics"):
+        for depth, count in enumerate(other.depth_counts, 1):
+            while len(self.depth_counts) < depth:
+                self.depth_counts.append(0)
+            self.depth_counts[depth - 1] += count
+
+        if self.compact:
+            for elapsed in other.node_times:
+                self._record_time(elapsed)
+
+            self.node_count += other.node_count
+            self.node_time_total += other.node_time_total
+            self.node_time_histogram = [a + b for a, b in zip(self.node_time_histogram, other.node_time_histogram)]
+
+            for value in (other.node_time_min, other.node_time_max):
+                if value is not None:
+                    self.node_time_min = value if self.node_time_min is None else min(self.node_time_min, value)
+                    self.node_time_max = value if self.node_time_max is None else max(self.node_time_max, value)
+        else:
+            self.node_times.extend(other.node_times)
+
+    @property
+    def average_depth(self) -> float:
+        if sum(self.depth_counts) == 0:
+            return 0
+
+        return sum(depth * count for depth, count in enumerate(self.depth_counts, 1)) / sum(self.depth_counts)
+
+    def to_move_statistics(self) -> MoveStatistics:
+        if not self.compact:
+            return MoveStatistics(
+                node_times=self.node_times,
+                depth_counts=self.depth_counts,
+                average_recursive_depth=self.average_depth
+            )
+
+        return MoveStatistics(
+            node_times=[],
+            depth_counts=self.depth_counts,
+            average_recursive_depth=self.average_depth,
+            node_count=self.node_count,
+            node_time_total=self.node_time_total,
+            node_time_min=self.node_time_min,
+            node_time_max=self.node_time_max,
+            node_time_histogram=self.node_time_histogram
+        )
+
+class Search:
+    board: BitBoard
+    heuristic: any
+    order: List[Tile]
+    deadline: Deadline
+    statistics: SearchStatistics
+    table: TranspositionTable
+    prune: bool
+    symmetry: Symmetry
+
+    def __init__(self, board: BitBoard, heuristic: any, order: List[Tile], deadline: Deadline, statistics: SearchStatistics, table: TranspositionTable = None, prune: bool = True):
+        self.board = board
+        self.heuristic = heuristic
+        self.order = order
+        self.deadline = deadline
+        self.statistics = statistics
+        self.table = table
+        self.prune = prune
+        self.symmetry = board.symmetry if len(board.symmetry) > 1 else None
+
+    def table_key(self, tile: Tile) -> Tuple[int, int]:
+        if self.symmetry is None:
+            return self.board.hash ^ self.board.keys.turn_key(tile), 0
+
+        key, transform = self.symmetry.canonical(self.board)
+
+        return key ^ self.board.keys.turn_key(tile), transform
+
+    def probe(self, key: int, transform: int, depth: int, alpha: float, beta: float) -> Tuple[Union[float, None], Union[Move, None]]:
+        score, move = self.table.probe(key, depth, alpha, beta)
+
+        if move is not None and self.symmetry is not None:
+            move = self.symmetry.from_canonical(move, transform)
+
+        return score, move
+
+    def store(self, key: int, transform: int, depth: int, score: float, bound: Bound, move: Move):
+        if self.symmetry is not None:
+            move = self.symmetry.to_canonical(move, transform)
+
+        self.table.store(key, depth, score, bound, move)
+
+    def next_tile(self, tile: Tile) -> Tile:
+        return self.order[(self.order.index(tile) + 1) % len(self.order)]
+
+    def evaluate(self, depth: int) -> float:
+        start = time.perf_counter()
+        score = self.heuristic.get_score(self.board)
+        self.statistics.record(depth, time.perf_counter() - start)
+
+        return score
+
+    def score_move(self, move: Move, tile: Tile, depth: int, ply: int, alpha: float, beta: float) -> float:
+        x, y = move
+        board = self.board
+
+        board.make(x, y, tile)
+        try:
+            if board.is_win(tile, x, y):
+                score = WIN_SCORE - ply if tile == self.heuristic.tile else ply - WIN_SCORE
+            elif board.is_full:
+                score = 0
+            elif depth <= 1:
+                score = self.evaluate(ply + 1)
+            else:
+                score, _ = self.search(self.next_tile(tile), depth - 1, ply + 1, alpha, beta)
+        finally:
+            board.unmake()
+
+        return score
+
+    def score_frontier(self, moves: List[Move], tile: Tile, ply: int) -> List[float]:
+        board = self.board
+        parent = board_to_array(board)
+        scores = [0.0] * len(moves)
+        leaves = []
+
+        for i, (x, y) in enumerate(moves):
+            board.make(x, y, tile)
+            try:
+                if board.is_win(tile, x, y):
+                    scores[i] = WIN_SCORE - ply if tile == self.heuristic.tile else ply - WIN_SCORE
+                elif not board.is_full:
+                    leaves.append((i, board.index(x, y)))
+            finally:
+                board.unmake()
+
+        if len(leaves) > 0:
+            children = np.repeat(parent[np.newaxis], len(leaves), axis=0)
+            children[np.arange(len(leaves)), [index for _, index in leaves]] = tile.value
+
+            start = time.perf_counter()
+            values = self.heuristic.get_scores(children)
+            elapsed = (time.perf_counter() - start) / len(leaves)
+
+            for (i, _), value in zip(leaves, values):
+                scores[i] = float(value)
+                self.statistics.record(ply + 1, elapsed)
+
+        return scores
+
+    def search(self, tile: Tile, depth: int, ply: int = 0, alpha: float = -float("inf"), beta: float = float("inf"), moves: List[Move] = None) -> Tuple[float, Union[Move, None]]:
+        self.deadline.check()
+
+        key = None
+        table_move = None
+        if self.table is not None and moves is None:
+            key, transform = self.table_key(tile)
+            score, table_move = self.probe(key, transform, depth, alpha, beta)
+
+            if score is not None and (ply > 0 or table_move is not None):
+                return score, table_move
+
+        if moves is None:
+            moves = list(self.board.moves())
+
+        if table_move in moves:
+            moves.remove(table_move)
+            moves.insert(0, table_move)
+
+        maximizing = tile == self.heuristic.tile
+        original_alpha, original_beta = alpha, beta
+        best_score = -float("inf") if maximizing else float("inf")
+        best_move = None
+
+        frontier = None
+        if depth <= 1 and self.heuristic.batched:
+            frontier = self.score_frontier(moves, tile, ply)
+
+        for i, move in enumerate(moves):
+            score = frontier[i] if frontier is not None else self.score_move(move, tile, depth, ply, alpha, beta)
+
+            if maximizing:
+                if score > best_score:
+                    best_score, best_move = score, move
+                if self.prune:
+                    alpha = max(alpha, score)
+            else:
+                if score < best_score:
+                    best_score, best_move = score, move
+                if self.prune:
+                    beta = min(beta, score)
+
+            if self.prune and alpha >= beta:
+                break
+
+        if best_move is None:
+            return 0, None
+
+        if key is not None:
+            if best_score <= original_alpha:
+                bound = Bound.UPPER
+            elif best_score >= original_beta:
+                bound = Bound.LOWER
+            else:
+                bound = Bound.EXACT
+
+            self.store(key, transform, depth, best_score, bound, best_move)
+
+        return best_score, best_move
@@ -0,0 +1,91 @@
+from enum import Enum
+from typing import Tuple, Union
+
+from ..common import Move
+
+class Bound(Enum):
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+TableEntry = Tuple[int, int, float, Bound, Move]
+
+class TranspositionTable:
+    __slots__ = ("size", "hits", "misses", "stores", "_deep", "_recent")
+
+    def __init__(self, size: int):
+        if size <= 0:
+            raise TypeError("Invalid transposition table size.")
+
+        self.size = size
+        self._deep = [None] * size
+        self._recent = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def lookup(self, key: int) -> Union[TableEntry, None]:
+        bucket = key % self.size
+
+        entry = self._deep[bucket]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+
+        entry = self._recent[bucket]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        return None
+
+    def probe(self, key: int, depth: int, alpha: float, beta: float) -> Tuple[Union[float, None], Union[Move, None]]:
+        entry = self.lookup(key)
+
+        if entry is None:
+            return None, None
+
+        _, entry_depth, score, bound, move = entry
+
+        if entry_depth >= depth:
+            if bound == Bound.EXACT:
+                return score, move
+            if bound == Bound.LOWER and score >= beta:
+                return score, move
+            if bound == Bound.UPPER and score <= alpha:
+                return score, move
+
+        return None, move
+
+    def store(self, key: int, depth: int, score: float, bound: Bound, move: Move):
+        bucket = key % self.size
+        entry = (key, depth, score, bound, move)
+        deep = self._deep[bucket]
+
+        self.stores += 1
+
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            self._deep[bucket] = entry
+        else:
+            self._recent[bucket] = entry
+
+    def clear(self):
+        self._deep = [None] * self.size
+        self._recent = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @property
+    def hit_rate(self) -> float:
+        if self.hits + self.misses == 0:
+            return 0
+
+        return self.hits / (self.hits + self.misses)
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self._deep if entry is not None) + sum(1 for entry in self._recent if entry is not None)
+
+    def __repr__(self):
+        return f"TranspositionTable(size={self.size}, hits={self.hits}, misses={self.misses}, stores={self.stores})"
@@ -1,4 +1,8 @@
-from .exceptions import LEMException
-from .packets import Parameters, PlayPacket, ErrorPacket, MovePacket, ParametersPacket, WinPacket, JoinPacket, JoinResponsePacket, ViewPacket, MoveStatistics
+from .exceptions import LEMException, SearchTimeout
+from .packets import Parameters, PlayPacket, ErrorPacket, MovePacket, ParametersPacket, WinPacket, JoinPacket, JoinResponsePacket, ViewPacket, MoveStatistics, DeltaPacket, LeanPlayPacket
 from .types import AlgorithmType, PlayerType, Tile, Board, Move, GameUUID, PlayerUUID, HeuristicType, Emojis
-from .utils import tile_to_emoji, make_line
+from .utils import tile_to_emoji, get_rank, get_score
+from .board import BitBoard
+from .lines import LineTable, get_line_table
+from .zobrist import ZobristKeys, get_zobrist_keys
+from .symmetry import Symmetry, get_symmetry
@@ -0,0 +1,170 @@
+from typing import Iterator, List, Tuple
+
+from .exceptions import LEMException
+from .types import Tile, Move, Board
+from .lines import get_line_table
+from .zobrist import ZobristKeys, get_zobrist_keys
+from .symmetry import Symmetry, get_symmetry
+
+class BitBoard:
+    __slots__ = ("board_size", "line_up_size", "hash", "block_hash", "_bits", "_history", "_full", "_lines", "_cell_lines", "_keys")
+
+    def __init__(self, board_size: int, line_up_size: int, blocks: List[Tuple[int, int]] = None, player_count: int = None):
+        self.board_size = board_size
+        self.line_up_size = line_up_size
+        self.hash = 0
+        self._bits = [0] * (len(Tile) - 1)
+        self._history = []
+        self._full = (1 << board_size ** 2) - 1
+        table = get_line_table(board_size, line_up_size)
+        self._lines, self._cell_lines = table.masks, table.cell_masks
+        self._keys = get_zobrist_keys(board_size, player_count or len(self._bits) - 1)
+
+        for x, y in blocks or []:
+            index = self.index(x, y)
+            self._bits[Tile.BLOCK.value + 1] |= 1 << index
+            self.hash ^= self._keys.key(Tile.BLOCK, index)
+
+        self.block_hash = self.hash
+
+    @classmethod
+    def from_moves(cls, board_size: int, line_up_size: int, moves: List[Tuple[int, int, Tile]], blocks: List[Tuple[int, int]] = None, player_count: int = None) -> "BitBoard":
+        board = cls(board_size=board_size, line_up_size=line_up_size, blocks=blocks, player_count=player_count)
+
+        for x, y, tile in moves:
+            board.make(x, y, tile)
+
+        return board
+
+    def copy(self) -> "BitBoard":
+        board = BitBoard.__new__(BitBoard)
+        board.board_size = self.board_size
+        board.line_up_size = self.line_up_size
+        board.hash = self.hash
+        board.block_hash = self.block_hash
+        board._bits = list(self._bits)
+        board._history = list(self._history)
+        board._full = self._full
+        board._lines = self._lines
+        board._cell_lines = self._cell_lines
+        board._keys = self._keys
+
+        return board
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.board_size + x
+
+    def coordinate(self, index: int) -> Move:
+        return (index % self.board_size, index // self.board_size)
+
+    @property
+    def keys(self) -> ZobristKeys:
+        return self._keys
+
+    def bits(self, tile: Tile) -> int:
+        return self._bits[tile.value + 1]
+
+    @property
+    def occupied(self) -> int:
+        occupied = 0
+
+        for bits in self._bits:
+            occupied |= bits
+
+        return occupied
+
+    @property
+    def empty(self) -> int:
+        return self._full & ~self.occupied
+
+    @property
+    def is_full(self) -> bool:
+        return self.empty == 0
+
+    @property
+    def history(self) -> List[Tuple[int, int, Tile]]:
+        return [(*self.coordinate(index), tile) for index, tile in self._history]
+
+    @property
+    def placements(self) -> List[Tuple[int, Tile]]:
+        return self._history
+
+    @property
+    def symmetry(self) -> Symmetry:
+        return get_symmetry(self.board_size, self.bits(Tile.BLOCK))
+
+    def canonical_hash(self) -> Tuple[int, int]:
+        return self.symmetry.canonical(self)
+
+    @property
+    def blocks(self) -> List[Tuple[int, int]]:
+        return [self.coordinate(index) for index in self._iter_bits(self.bits(Tile.BLOCK))]
+
+    def get(self, x: int, y: int) -> Tile:
+        bit = 1 << self.index(x, y)
+
+        for i, bits in enumerate(self._bits):
+            if bits & bit:
+                return Tile(i - 1)
+
+        return Tile.EMPTY
+
+    def is_empty(self, x: int, y: int) -> bool:
+        return not self.occupied & (1 << self.index(x, y))
+
+    def make(self, x: int, y: int, tile: Tile):
+        index = self.index(x, y)
+        bit = 1 << index
+
+        if self.occupied & bit:
+            raise LEMException("Tile not empty.")
+
+        self._bits[tile.value + 1] |= bit
+        self._history.append((index, tile))
+        self.hash ^= self._keys.tiles[tile.value + 1][index]
+
+    def unmake(self) -> Tuple[int, int, Tile]:
+        index, tile = self._history.pop()
+        self._bits[tile.value + 1] &= ~(1 << index)
+        self.hash ^= self._keys.tiles[tile.value + 1][index]
+
+        return (*self.coordinate(index), tile)
+
+    def _iter_bits(self, bits: int) -> Iterator[int]:
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def moves(self) -> Iterator[Move]:
+        for index in self._iter_bits(self.empty):
+            yield self.coordinate(index)
+
+    def is_win(self, tile: Tile, x: int = None, y: int = None) -> bool:
+        bits = self.bits(tile)
+        lines = self._lines if x is None else self._cell_lines[self.index(x, y)]
+
+        return any(bits & mask == mask for mask in lines)
+
+    def winner(self) -> Tile:
+        for tile in Tile:
+            if tile.value >= 0 and self.is_win(tile):
+                return tile
+
+        return Tile.EMPTY
+
+    def to_tile_board(self) -> Board:
+        board = [[Tile.EMPTY for __ in range(self.board_size)] for _ in range(self.board_size)]
+
+        for i, bits in enumerate(self._bits):
+            for index in self._iter_bits(bits):
+                x, y = self.coordinate(index)
+                board[y][x] = Tile(i - 1)
+
+        return board
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    def __repr__(self):
+        return f"BitBoard(board_size={self.board_size}, line_up_size={self.line_up_size}, moves={len(self)})"
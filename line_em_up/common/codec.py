@@ -0,0 +1,159 @@
+from dataclasses import MISSING, fields, is_dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Union, get_args, get_origin, get_type_hints
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+Encoder = Callable[[any], any]
+Decoder = Callable[[any], any]
+
+def _identity(value: any) -> any:
+    return value
+
+def _compile(hint: any) -> Tuple[Encoder, Decoder]:
+    origin = get_origin(hint)
+    args = get_args(hint)
+
+    if origin is Union:
+        options = [arg for arg in args if arg is not type(None)]
+        return _compile(options[0]) if len(options) == 1 else (_identity, _identity)
+
+    if isinstance(hint, type) and issubclass(hint, Enum):
+        values = {member: member.value for member in hint}
+        members = {member.value: member for member in hint}
+
+        return values.__getitem__, members.__getitem__
+
+    if is_dataclass(hint):
+        codec = get_codec(hint)
+
+        return codec.encode, codec.decode
+
+    if origin in (list, List):
+        encode, decode = _compile(args[0]) if args else (_identity, _identity)
+
+        if encode is _identity and decode is _identity:
+            return list, list
+
+        return (
+            lambda values: [None if value is None else encode(value) for value in values],
+            lambda values: [None if value is None else decode(value) for value in values]
+        )
+
+    if origin in (tuple, Tuple):
+        if len(args) == 2 and args[1] is Ellipsis:
+            encode, decode = _compile(args[0])
+
+            return (
+                lambda values: tuple(encode(value) for value in values),
+                lambda values: tuple(decode(value) for value in values)
+            )
+
+        coders = [_compile(arg) for arg in args]
+
+        if all(encode is _identity and decode is _identity for encode, decode in coders):
+            return tuple, tuple
+
+        return (
+            lambda values: tuple(encode(value) for (encode, _), value in zip(coders, values)),
+            lambda values: tuple(decode(value) for (_, decode), value in zip(coders, values))
+        )
+
+    if origin in (dict, Dict):
+        encode_key, decode_key = _compile(args[0]) if args else (_identity, _identity)
+        encode_value, decode_value = _compile(args[1]) if args else (_identity, _identity)
+
+        if args and args[0] is int:
+            decode_key = int
+
+        return (
+            lambda values: {encode_key(key): encode_value(value) for key, value in values.items()},
+            lambda values: {decode_key(key): decode_value(value) for key, value in values.items()}
+        )
+
+    return _identity, _identity
+
+class PacketCodec:
+    __slots__ = ("cls", "fields")
+
+    def __init__(self, cls: type):
+        hints = get_type_hints(cls)
+
+        self.cls = cls
+        self.fields = []
+
+        for field in fields(cls):
+            encode, decode = _compile(hints[field.name])
+            required = field.default is MISSING and field.default_factory is MISSING
+
+            self.fields.append((field.name, encode, decode, required))
+
+    def encode(self, packet: any) -> Dict[str, any]:
+        d = {}
+
+        for name, encode, _, _ in self.fields:
+            value = getattr(packet, name)
+            d[name] = None if value is None else encode(value)
+
+        return d
+
+    def decode(self, d: Dict[str, any]) -> any:
+        nd = {}
+
+        for name, _, decode, required in self.fields:
+            if name in d:
+                value = d[name]
+                nd[name] = None if value is None else decode(value)
+            elif required:
+                raise TypeError(f"Missing field '{name}'.")
+
+        return self.cls(**nd)
+
+    def __repr__(self):
+        return f"PacketCodec(cls={self.cls.__name__})"
+
+@lru_cache(maxsize=None)
+def get_codec(cls: type) -> PacketCodec:
+    return PacketCodec(cls)
+
+def codecs() -> List[str]:
+    return [JSON, MSGPACK] if msgpack is not None else [JSON]
+
+def negotiate(codec: str) -> str:
+    return codec if codec in codecs() else JSON
+
+def dumps(packet: any, codec: str = JSON) -> Union[Dict[str, any], bytes]:
+    d = packet.to_dict()
+
+    if codec == MSGPACK:
+        return msgpack.packb(d)
+
+    return d
+
+def loads(cls: type, data: Union[Dict[str, any], bytes]) -> any:
+    if isinstance(data, (bytes, bytearray)):
+        if msgpack is None:
+            raise TypeError("Binary packet received without msgpack installed.")
+
+        data = msgpack.unpackb(data, strict_map_key=False)
+
+    return cls.from_dict(data)
+
+def packet(cls: type) -> type:
+    def to_dict(self) -> Dict[str, any]:
+        return get_codec(cls).encode(self)
+
+    def from_dict(packet_cls: type, d: Dict[str, any]) -> any:
+        return get_codec(packet_cls).decode(d)
+
+    cls.to_dict = to_dict
+    cls.from_dict = classmethod(from_dict)
+
+    return cls
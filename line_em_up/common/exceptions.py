@@ -1,2 +1,5 @@
 class LEMException(Exception):
     pass
+
+class SearchTimeout(LEMException):
+    pass
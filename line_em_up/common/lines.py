@@ -0,0 +1,61 @@
+from functools import lru_cache
+from typing import Tuple
+
+from .types import Move
+
+DIRECTIONS = [(1, 0), (1, 1), (0, 1), (1, -1)]
+
+class LineTable:
+    __slots__ = ("board_size", "line_up_size", "windows", "indices", "cell_windows", "_masks", "_cell_masks")
+
+    def __init__(self, board_size: int, line_up_size: int):
+        self.board_size = board_size
+        self.line_up_size = line_up_size
+
+        windows = []
+        cell_windows = [[] for _ in range(board_size ** 2)]
+
+        for y in range(board_size):
+            for x in range(board_size):
+                for dx, dy in DIRECTIONS:
+                    ex, ey = x + dx * (line_up_size - 1), y + dy * (line_up_size - 1)
+
+                    if ex < 0 or ex >= board_size or ey < 0 or ey >= board_size:
+                        continue
+
+                    window = tuple((x + dx * i, y + dy * i) for i in range(line_up_size))
+
+                    for wx, wy in window:
+                        cell_windows[wy * board_size + wx].append(len(windows))
+                    windows.append(window)
+
+        self.windows: Tuple[Tuple[Move, ...], ...] = tuple(windows)
+        self.indices: Tuple[Tuple[int, ...], ...] = tuple(tuple(y * board_size + x for x, y in window) for window in windows)
+        self.cell_windows: Tuple[Tuple[int, ...], ...] = tuple(tuple(ids) for ids in cell_windows)
+        self._masks = None
+        self._cell_masks = None
+
+    @property
+    def masks(self) -> Tuple[int, ...]:
+        if self._masks is None:
+            self._masks = tuple(sum(1 << index for index in indices) for indices in self.indices)
+
+        return self._masks
+
+    @property
+    def cell_masks(self) -> Tuple[Tuple[int, ...], ...]:
+        if self._cell_masks is None:
+            masks = self.masks
+            self._cell_masks = tuple(tuple(masks[i] for i in ids) for ids in self.cell_windows)
+
+        return self._cell_masks
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def __repr__(self):
+        return f"LineTable(board_size={self.board_size}, line_up_size={self.line_up_size}, windows={len(self)})"
+
+@lru_cache(maxsize=None)
+def get_line_table(board_size: int, line_up_size: int) -> LineTable:
+    return LineTable(board_size=board_size, line_up_size=line_up_size)
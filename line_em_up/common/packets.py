@@ -1,7 +1,10 @@
 from dataclasses import dataclass
-from dataclasses_json import dataclass_json
 from .types import AlgorithmType, PlayerUUID, GameUUID, PlayerType, Move, Tile, HeuristicType
+from .board import BitBoard
+from .utils import tile_to_emoji
+from .codec import JSON, packet
 from typing import List, Tuple, Union, Set, Dict
+import bisect
 import itertools
 import string
 
@@ -154,8 +157,13 @@ class Parameters:
             nd['blocks'] = None
             nd['block_count'] = int(d['block_count'])
 
+        if nd['blocks']:
+            nd['blocks'] = list(dict.fromkeys(nd['blocks']))
+            nd['block_count'] = len(nd['blocks'])
+
         return Parameters(**nd)
 
+@packet
 @dataclass
 class PlayPacket:
     tile: Tile
@@ -163,102 +171,145 @@ class PlayPacket:
     moves: List[Tuple[int, int, Tile]]
     blocks: List[Tuple[int, int]]
     order: List[Tile]
+    seq: int = 0
 
-    def to_dict(self):
-        d = vars(self)
+    def apply(self, delta: "DeltaPacket") -> bool:
+        if delta.seq != self.seq + 1:
+            return False
 
-        d['tile'] = d['tile'].value
-        d['moves'] = [(x, y, tile.value) for x, y, tile in d['moves']]
-        d['blocks'] = [(x, y) for x, y in d['blocks']]
-        d['order'] = [tile.value for tile in d['order']]
+        if delta.move is not None:
+            x, y, tile = delta.move
+            self.moves.append((x, y, tile))
 
-        return d
+            if self.emoji_board:
+                self.emoji_board[y][x] = tile_to_emoji(tile)
 
-    @classmethod
-    def from_dict(cls, d: any):
-        nd = {}
+        self.tile = delta.tile
+        self.order = delta.order
+        self.seq = delta.seq
+
+        return True
+
+    def to_bitboard(self, board_size: int, line_up_size: int, player_count: int = None) -> BitBoard:
+        return BitBoard.from_moves(
+            board_size=board_size,
+            line_up_size=line_up_size,
+            moves=self.moves,
+            blocks=self.blocks,
+            player_count=player_count
+        )
 
-        nd['tile'] = Tile(d['tile'])
-        nd['emoji_board'] = d['emoji_board']
-        nd['moves'] = [(x, y, Tile(tile)) for x, y, tile in d['moves']]
-        nd['blocks'] = [(x, y) for x, y in d['blocks']]
-        nd['order'] = [Tile(tile) for tile in d['order']]
+def pack_move(index: int, tile: Tile) -> int:
+    return index << 2 | tile.value
 
-        return PlayPacket(**nd)
+def unpack_move(move: int) -> Tuple[int, Tile]:
+    return move >> 2, Tile(move & 3)
 
-@dataclass_json
+@packet
+@dataclass
+class LeanPlayPacket:
+    tile: Tile
+    moves: List[int]
+    blocks: List[int]
+    order: List[Tile]
+    seq: int = 0
+
+    @classmethod
+    def from_board(cls, board: BitBoard, tile: Tile, order: List[Tile], seq: int = 0):
+        return LeanPlayPacket(
+            tile=tile,
+            moves=[pack_move(index, move_tile) for index, move_tile in board.placements],
+            blocks=[board.index(x, y) for x, y in board.blocks],
+            order=order,
+            seq=seq
+        )
+
+    def to_play_packet(self, board_size: int) -> PlayPacket:
+        moves = []
+        for move in self.moves:
+            index, tile = unpack_move(move)
+            moves.append((index % board_size, index // board_size, tile))
+
+        return PlayPacket(
+            tile=self.tile,
+            emoji_board=None,
+            moves=moves,
+            blocks=[(index % board_size, index // board_size) for index in self.blocks],
+            order=self.order,
+            seq=self.seq
+        )
+
+@packet
+@dataclass
+class DeltaPacket:
+    seq: int
+    tile: Tile
+    order: List[Tile]
+    move: Tuple[int, int, Tile] = None
+    emoji: str = None
+
+@packet
 @dataclass
 class ErrorPacket:
     error: str
 
-@dataclass_json
+NODE_TIME_BUCKETS = [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1, 10]
+
+def node_time_bucket(time: float) -> int:
+    return bisect.bisect_right(NODE_TIME_BUCKETS, time)
+
+@packet
 @dataclass
 class MoveStatistics:
     node_times: List[float]
     depth_counts: List[int]
     average_recursive_depth: float
+    node_count: int = None
+    node_time_total: float = None
+    node_time_min: float = None
+    node_time_max: float = None
+    node_time_histogram: List[int] = None
 
-@dataclass
-class MovePacket:
-    move: Move
-    statistics: MoveStatistics = None
-
-    def to_dict(self):
-        d = vars(self)
-        nd = {}
-
-        (x, y) = d['move']
-        nd['move'] = (x, y)
-
-        if d['statistics']:
-            nd['statistics'] = d['statistics'].to_dict()
+    @property
+    def total_time(self) -> float:
+        if self.node_time_total is None:
+            return sum(self.node_times)
 
-        return nd
-
-    @classmethod
-    def from_dict(cls, d: any):
-        nd = {}
+        return self.node_time_total
 
-        (x, y) = d['move']
-        nd['move'] = (x, y)
+    @property
+    def average_depth(self) -> float:
+        if sum(self.depth_counts) == 0:
+            return 0
 
-        if 'statistics' in d:
-            nd['statistics'] = MoveStatistics.from_dict(d['statistics'])
+        return sum(depth * count for depth, count in enumerate(self.depth_counts, 1)) / sum(self.depth_counts)
 
-        return MovePacket(**nd)
+@packet
+@dataclass
+class MovePacket:
+    move: Move
+    statistics: MoveStatistics = None
 
-@dataclass_json
+@packet
 @dataclass
 class ParametersPacket:
     game_id: GameUUID
 
-@dataclass_json
+@packet
 @dataclass
 class WinPacket:
     ranks: Dict[int, int]
 
+@packet
 @dataclass
 class JoinPacket:
     game_id: GameUUID
     player_name: str
     player_type: PlayerType
+    lean: bool = False
+    codec: str = JSON
 
-    def to_dict(self):
-        d = vars(self)
-        d['player_type'] = d['player_type'].value
-
-        return d
-
-    @classmethod
-    def from_dict(cls, d: any):
-        nd = {}
-
-        nd['game_id'] = d['game_id']
-        nd['player_name'] = d['player_name']
-        nd['player_type'] = PlayerType(d['player_type'])
-
-        return JoinPacket(**nd)
-
+@packet
 @dataclass
 class JoinResponsePacket:
     socket_id: str
@@ -267,28 +318,11 @@ class JoinResponsePacket:
     player_type: PlayerType
     tile: Tile
     tile_emoji: str
+    codec: str = JSON
 
-    def to_dict(self):
-        d = vars(self)
-        d['player_type'] = d['player_type'].value
-        d['tile'] = d['tile'].value
-
-        return d
-
-    @classmethod
-    def from_dict(cls, d: any):
-        nd = {}
-
-        nd['socket_id'] = d['socket_id']
-        nd['player_id'] = d['player_id']
-        nd['player_name'] = d['player_name']
-        nd['player_type'] = PlayerType(d['player_type'])
-        nd['tile'] = Tile(d['tile'])
-        nd['tile_emoji'] = d['tile_emoji']
-
-        return JoinResponsePacket(**nd)
-
-@dataclass_json
+@packet
 @dataclass
 class ViewPacket:
     game_id: GameUUID
+    lean: bool = False
+    codec: str = JSON
@@ -1,19 +1,32 @@
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, CheckConstraint, UniqueConstraint, ForeignKey, Enum, Float
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, CheckConstraint, UniqueConstraint, ForeignKey, Enum, Float, Index, LargeBinary, text
+from sqlalchemy.schema import CreateColumn, CreateIndex
 from typing import Tuple, List, Dict
+import json
+import logging
+import struct
+import zlib
 
-from .packets import Parameters, MoveStatistics
+from .packets import Parameters, MoveStatistics, pack_move, unpack_move
 from .types import Tile, PlayerType, AlgorithmType, HeuristicType
-from .utils import tile_to_emoji, make_line
+from .utils import tile_to_emoji, get_rank, get_score
+from .board import BitBoard
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
 class Game(Base):
     __tablename__ = 'games'
+    __table_args__ = (
+        Index('ix_games_listed_complete', 'listed', 'complete'),
+        Index('ix_games_complete', 'complete'),
+    )
 
     id = Column(Integer, primary_key=True)
     sessions = relationship("GameSession", back_populates="game")
-    tiles = relationship("GameTile")
+    tiles = relationship("GameTile", order_by="GameTile.id")
+    archive = relationship("GameArchive", uselist=False, back_populates="game")
 
     max_player_count = Column(Integer, nullable=False)
     board_size = Column(Integer, nullable=False)
@@ -29,6 +42,7 @@ class Game(Base):
     complete = Column("complete", Boolean, default=False)
     tile_winner = Column("winner", Enum(Tile), default=Tile.EMPTY)
     _tile_losers = Column("losers", String, default="")
+    seq = Column(Integer, default=0)
 
     @property
     def player_tiles(self) -> List[Tile]:
@@ -112,8 +126,15 @@ class Game(Base):
 
         return Tile(self.player_count)
 
+    @property
+    def archived(self) -> bool:
+        return self.archive is not None
+
     @property
     def blocks(self):
+        if self.archived:
+            return self.archive.blocks
+
         return [(tile.x, tile.y) for tile in filter(lambda tile: tile.type == Tile.BLOCK, self.tiles)]
 
     @property
@@ -126,12 +147,31 @@ class Game(Base):
 
     @property
     def moves(self):
+        if self.archived:
+            return self.archive.moves
+
         return [(tile.x, tile.y, tile.type) for tile in self.move_tiles]
 
+    @property
+    def move_statistics(self) -> List[MoveStatistics]:
+        if self.archived:
+            return self.archive.statistics
+
+        return [tile.statistics[0].move_statistics if tile.statistics else None for tile in self.move_tiles]
+
     @property
     def tile_board(self) -> List[List[Tile]]:
         board = [[Tile.EMPTY for __ in range(self.board_size)] for _ in range(self.board_size)]
 
+        if self.archived:
+            for x, y in self.archive.blocks:
+                board[y][x] = Tile.BLOCK
+
+            for x, y, tile in self.archive.moves:
+                board[y][x] = tile
+
+            return board
+
         for tile in self.tiles:
             board[tile.y][tile.x] = tile.type
 
@@ -166,7 +206,26 @@ class Game(Base):
             if not tile in self.tile_losers:
                 return tile
 
-    def check_complete(self) -> bool:
+    @property
+    def bitboard(self) -> BitBoard:
+        if getattr(self, "_bitboard", None) is None:
+            self._bitboard = BitBoard.from_moves(
+                board_size=self.board_size,
+                line_up_size=self.line_up_size,
+                moves=self.moves,
+                blocks=self.blocks,
+                player_count=self.max_player_count
+            )
+
+        return self._bitboard
+
+    def add_tile(self, tile: "GameTile"):
+        self.tiles.append(tile)
+
+        if getattr(self, "_bitboard", None) is not None:
+            self._bitboard.make(tile.x, tile.y, tile.type)
+
+    def check_complete(self, last_tile: "GameTile" = None) -> bool:
         if self.complete: 
             return True
 
@@ -177,21 +236,12 @@ class Game(Base):
                     break
             return True 
 
-        for tile in self.tiles:
-            for direction in [(1, 0), (1, 1), (0, 1), (1, -1)]:
-                line = make_line(
-                    point=(tile.x, tile.y), 
-                    direction=direction, 
-                    length=self.line_up_size,
-                    board_size=self.board_size
-                )
-
-                if not line: 
-                    continue
+        tiles = [last_tile] if last_tile else self.move_tiles
 
-                if all(any(lx == t.x and ly == t.y and t.type == tile.type for t in self.tiles) for lx, ly in line):
-                    self.tile_winner = tile.type
-                    return True
+        for tile in tiles:
+            if self.bitboard.is_win(tile.type, tile.x, tile.y):
+                self.tile_winner = tile.type
+                return True
 
         if len(self.tiles) == self.board_size ** 2:
             return True
@@ -217,6 +267,8 @@ class GameSession(Base):
     __tablename__ = 'sessions'
     __table_args__ = (
         UniqueConstraint('game_id', 'player_id', 'socket_id', name='_game_session_uc'),
+        Index('ix_sessions_socket_id', 'socket_id'),
+        Index('ix_sessions_player_id', 'player_id'),
     )
 
     id = Column(Integer, primary_key=True)
@@ -258,33 +310,22 @@ class GameSession(Base):
 
     @property
     def rank(self) -> int:
-        if not self.game.complete:
-            return 0
-
-        if not self.game.tile_winner == Tile.EMPTY:
-            if self.tile == self.game.tile_winner:
-                return 1
-
-            if self.game.max_player_count == 2:
-                return 2
-            
-            for i, tile in enumerate(self.game.tile_losers, 3):
-                if tile == self.tile:
-                    return i
-
-            return 2
-        else:
-            for i, tile in enumerate(self.game.tile_losers, 2):
-                if tile == self.tile:
-                    return i
-
-            return 1
+        return get_rank(
+            tile=self.tile,
+            winner=self.game.tile_winner,
+            losers=self.game.tile_losers,
+            max_player_count=self.game.max_player_count,
+            complete=self.game.complete
+        )
 
     def __repr__(self):
         return f"GameSession(game_id={self.game_id}, player_id={self.player_id}, socket_id={self.socket_id})"
 
 class GameTile(Base):
     __tablename__ = 'tiles'
+    __table_args__ = (
+        Index('ix_tiles_game_position', 'game_id', 'x', 'y', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
 
@@ -300,18 +341,34 @@ class GameTile(Base):
 
 class Statistics(Base):
     __tablename__ = 'statistics'
+    __table_args__ = (
+        Index('ix_statistics_tile_id', 'tile_id'),
+    )
 
     id = Column(Integer, primary_key=True)
 
     tile_id = Column(Integer, ForeignKey('tiles.id'), nullable=False)
 
-    _node_times = Column("node_times", String, nullable=False)
+    _node_times = Column("node_times", String, nullable=False, default="")
     _depth_counts = Column("depth_counts", String, nullable=False)
     average_recursive_depth = Column(Float, nullable=False)
 
+    _node_count = Column("node_count", Integer)
+    node_time_total = Column(Float)
+    node_time_min = Column(Float)
+    node_time_max = Column(Float)
+    _node_time_histogram = Column("node_time_histogram", String, default="")
+
     @property
     def node_count(self) -> int:
-        return len(self.node_times)
+        if self._node_count is None:
+            return len(self.node_times)
+
+        return self._node_count
+
+    @node_count.setter
+    def node_count(self, count: int):
+        self._node_count = count
 
     @property
     def node_times(self) -> List[int]:
@@ -322,7 +379,25 @@ class Statistics(Base):
 
     @node_times.setter
     def node_times(self, times: List[int]):
-        self._node_times = ','.join(str(time) for time in times)
+        self._node_times = ','.join(str(time) for time in times or [])
+
+    @property
+    def node_time_histogram(self) -> List[int]:
+        if not self._node_time_histogram or self._node_time_histogram.strip() == "":
+            return []
+
+        return [int(count) for count in self._node_time_histogram.split(",")]
+
+    @node_time_histogram.setter
+    def node_time_histogram(self, counts: List[int]):
+        self._node_time_histogram = ','.join(str(count) for count in counts or [])
+
+    @property
+    def total_time(self) -> float:
+        if self.node_time_total is None:
+            return sum(self.node_times)
+
+        return self.node_time_total
 
     @property
     def depth_counts(self) -> List[int]:
@@ -337,10 +412,10 @@ class Statistics(Base):
 
     @property
     def average_time(self) -> float:
-        if len(self.node_times) == 0:
+        if self.node_count == 0:
             return 0
 
-        return sum(self.node_times) / len(self.node_times)
+        return self.total_time / self.node_count
 
     @property
     def average_depth(self) -> float:
@@ -349,9 +424,95 @@ class Statistics(Base):
 
         return sum(depth * count for depth, count in enumerate(self.depth_counts, 1)) / sum(self.depth_counts)
 
+    @property
+    def move_statistics(self) -> MoveStatistics:
+        return MoveStatistics(
+            node_times=self.node_times,
+            depth_counts=self.depth_counts,
+            average_recursive_depth=self.average_recursive_depth,
+            node_count=self._node_count,
+            node_time_total=self.node_time_total,
+            node_time_min=self.node_time_min,
+            node_time_max=self.node_time_max,
+            node_time_histogram=self.node_time_histogram or None
+        )
+
     def __repr__(self):
         return f"Statistics(tile={self.tile_id})"
 
+class GameArchive(Base):
+    __tablename__ = 'game_archives'
+
+    game_id = Column(Integer, ForeignKey('games.id'), primary_key=True)
+    game = relationship("Game", back_populates="archive")
+
+    board_size = Column(Integer, nullable=False)
+    _blocks = Column("blocks", LargeBinary, nullable=False, default=b"")
+    _moves = Column("moves", LargeBinary, nullable=False, default=b"")
+    _statistics = Column("statistics", LargeBinary)
+
+    @classmethod
+    def from_game(cls, game: Game) -> "GameArchive":
+        archive = GameArchive(game_id=game.id, board_size=game.board_size)
+        archive.blocks = game.blocks
+        archive.moves = game.moves
+        archive.statistics = game.move_statistics
+
+        return archive
+
+    @property
+    def _format(self) -> str:
+        return "H" if self.board_size ** 2 < 1 << 14 else "I"
+
+    def _pack(self, values: List[int]) -> bytes:
+        return struct.pack(f"<{len(values)}{self._format}", *values)
+
+    def _unpack(self, data: bytes) -> List[int]:
+        data = data or b""
+
+        return list(struct.unpack(f"<{len(data) // struct.calcsize(self._format)}{self._format}", data))
+
+    @property
+    def blocks(self) -> List[Tuple[int, int]]:
+        return [(index % self.board_size, index // self.board_size) for index in self._unpack(self._blocks)]
+
+    @blocks.setter
+    def blocks(self, blocks: List[Tuple[int, int]]):
+        self._blocks = self._pack([y * self.board_size + x for x, y in blocks])
+
+    @property
+    def moves(self) -> List[Tuple[int, int, Tile]]:
+        moves = []
+
+        for move in self._unpack(self._moves):
+            index, tile = unpack_move(move)
+            moves.append((index % self.board_size, index // self.board_size, tile))
+
+        return moves
+
+    @moves.setter
+    def moves(self, moves: List[Tuple[int, int, Tile]]):
+        self._moves = self._pack([pack_move(y * self.board_size + x, tile) for x, y, tile in moves])
+
+    @property
+    def statistics(self) -> List[MoveStatistics]:
+        if not self._statistics:
+            return [None] * (len(self._moves) // struct.calcsize(self._format))
+
+        return [None if d is None else MoveStatistics.from_dict(d) for d in json.loads(zlib.decompress(self._statistics))]
+
+    @statistics.setter
+    def statistics(self, statistics: List[MoveStatistics]):
+        if not any(statistics):
+            self._statistics = None
+            return
+
+        d = [None if move is None else move.to_dict() for move in statistics]
+        self._statistics = zlib.compress(json.dumps(d, separators=(",", ":")).encode())
+
+    def __repr__(self):
+        return f"GameArchive(game_id={self.game_id}, moves={len(self._moves) // struct.calcsize(self._format)})"
+
 class Player(Base):
     __tablename__ = 'players'
     __table_args__ = (
@@ -361,6 +522,7 @@ class Player(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     sessions = relationship("GameSession", back_populates="player")
+    record = relationship("PlayerScore", uselist=False, back_populates="player")
 
     @property
     def unique_sessions(self):
@@ -380,12 +542,80 @@ class Player(Base):
 
         for session in self.unique_sessions:
             if session.game.complete:
-                if session.game.tile_winner == Tile.EMPTY:
-                    score += 0 if session.rank == 1 else -1
-                else:
-                    score += 2 if session.rank == 1 else -1
+                score += get_score(session.rank, session.game.tile_winner)
         
         return score
 
     def __repr__(self):
         return f"Player(id={self.id}, name={self.name}, type={self.type})"
+
+class PlayerScore(Base):
+    __tablename__ = 'player_scores'
+
+    player_id = Column(Integer, ForeignKey('players.id'), primary_key=True)
+    player = relationship("Player", back_populates="record")
+
+    score = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    ties = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    games = Column(Integer, nullable=False, default=0)
+
+    @staticmethod
+    def get_result(rank: int, winner: Tile) -> Dict[str, int]:
+        return dict(
+            score=get_score(rank, winner),
+            wins=int(rank == 1 and winner != Tile.EMPTY),
+            ties=int(rank == 1 and winner == Tile.EMPTY),
+            losses=int(rank != 1),
+            games=1
+        )
+
+    def add_result(self, rank: int, winner: Tile):
+        for key, value in PlayerScore.get_result(rank, winner).items():
+            setattr(self, key, (getattr(self, key) or 0) + value)
+
+    def __repr__(self):
+        return f"PlayerScore(player_id={self.player_id}, score={self.score}, wins={self.wins}, ties={self.ties}, losses={self.losses})"
+
+Index('ix_player_scores_score', PlayerScore.score.desc(), PlayerScore.player_id)
+
+def add_columns(engine: any):
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            columns = {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+
+            for column in table.columns:
+                if column.name not in columns:
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}")
+
+def create_indexes(engine: any):
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                sql = connection.execute(text("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": index.name}).scalar()
+
+                if sql is not None and sql.split() != str(CreateIndex(index).compile(dialect=engine.dialect)).split():
+                    index.drop(bind=connection)
+
+                index.create(bind=connection, checkfirst=True)
+
+def remove_duplicate_tiles(engine: any) -> int:
+    with engine.begin() as connection:
+        if connection.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ix_tiles_game_position'")).first() is not None:
+            return 0
+
+        kept = "SELECT MIN(id) FROM tiles GROUP BY game_id, x, y"
+        connection.exec_driver_sql(f"DELETE FROM statistics WHERE tile_id IN (SELECT id FROM tiles WHERE id NOT IN ({kept}))")
+        count = connection.exec_driver_sql(f"DELETE FROM tiles WHERE id NOT IN ({kept})").rowcount
+
+    if count > 0:
+        logger.warning("Removed %s duplicate tiles before indexing tile positions.", count)
+
+    return count
+
+def upgrade_schema(engine: any):
+    Base.metadata.create_all(engine)
+    add_columns(engine)
+    remove_duplicate_tiles(engine)
+    create_indexes(engine)
@@ -0,0 +1,91 @@
+from functools import lru_cache
+from typing import Callable, List, Tuple
+
+from .types import Move
+
+TRANSFORMS: List[Callable[[int, int, int], Move]] = [
+    lambda x, y, n: (x, y),
+    lambda x, y, n: (n - 1 - y, x),
+    lambda x, y, n: (n - 1 - x, n - 1 - y),
+    lambda x, y, n: (y, n - 1 - x),
+    lambda x, y, n: (n - 1 - x, y),
+    lambda x, y, n: (x, n - 1 - y),
+    lambda x, y, n: (y, x),
+    lambda x, y, n: (n - 1 - y, n - 1 - x)
+]
+
+class Symmetry:
+    __slots__ = ("board_size", "transforms", "permutations", "inverses")
+
+    def __init__(self, board_size: int, blocks: int):
+        self.board_size = board_size
+        self.transforms = []
+        self.permutations = []
+        self.inverses = []
+
+        for i, transform in enumerate(TRANSFORMS):
+            permutation = [0] * board_size ** 2
+
+            for y in range(board_size):
+                for x in range(board_size):
+                    tx, ty = transform(x, y, board_size)
+                    permutation[y * board_size + x] = ty * board_size + tx
+
+            if self.__permute(blocks, permutation) != blocks:
+                continue
+
+            inverse = [0] * board_size ** 2
+            for index, target in enumerate(permutation):
+                inverse[target] = index
+
+            self.transforms.append(i)
+            self.permutations.append(tuple(permutation))
+            self.inverses.append(tuple(inverse))
+
+    def __permute(self, bits: int, permutation: List[int]) -> int:
+        permuted = 0
+
+        while bits:
+            low = bits & -bits
+            permuted |= 1 << permutation[low.bit_length() - 1]
+            bits ^= low
+
+        return permuted
+
+    def canonical(self, board: any) -> Tuple[int, int]:
+        if len(self.permutations) == 1:
+            return board.hash, 0
+
+        keys = board.keys.tiles
+        best_hash, best_transform = None, 0
+
+        for i, permutation in enumerate(self.permutations):
+            value = 0
+
+            for index, tile in board.placements:
+                value ^= keys[tile.value + 1][permutation[index]]
+
+            if best_hash is None or value < best_hash:
+                best_hash, best_transform = value, i
+
+        return best_hash ^ board.block_hash, best_transform
+
+    def to_canonical(self, move: Move, transform: int) -> Move:
+        index = self.permutations[transform][move[1] * self.board_size + move[0]]
+
+        return (index % self.board_size, index // self.board_size)
+
+    def from_canonical(self, move: Move, transform: int) -> Move:
+        index = self.inverses[transform][move[1] * self.board_size + move[0]]
+
+        return (index % self.board_size, index // self.board_size)
+
+    def __len__(self) -> int:
+        return len(self.permutations)
+
+    def __repr__(self):
+        return f"Symmetry(board_size={self.board_size}, transforms={self.transforms})"
+
+@lru_cache(maxsize=None)
+def get_symmetry(board_size: int, blocks: int) -> Symmetry:
+    return Symmetry(board_size=board_size, blocks=blocks)
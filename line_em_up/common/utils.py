@@ -1,5 +1,5 @@
 from .types import Tile, Emojis
-from typing import Tuple, Union, List
+from typing import List
 
 def tile_to_emoji(tile: Tile) -> str:
     if tile.name in Emojis:
@@ -7,15 +7,31 @@ def tile_to_emoji(tile: Tile) -> str:
     else:
         return Emojis["UNKNOWN"]
 
-def make_line(point: Tuple[int, int], direction: Tuple[int, int], length: int, board_size: int) -> Union[List[Tuple[int, int]], None]:
-    points = []
+def get_rank(tile: Tile, winner: Tile, losers: List[Tile], max_player_count: int, complete: bool) -> int:
+    if not complete:
+        return 0
 
-    for _ in range(length):
-        for v in point:
-            if v < 0 or v >= board_size:
-                return None
+    if not winner == Tile.EMPTY:
+        if tile == winner:
+            return 1
 
-        points.append(point)
-        point = tuple([p + d for p, d in zip(point, direction)])
+        if max_player_count == 2:
+            return 2
 
-    return points
+        for i, loser in enumerate(losers, 3):
+            if loser == tile:
+                return i
+
+        return 2
+    else:
+        for i, loser in enumerate(losers, 2):
+            if loser == tile:
+                return i
+
+        return 1
+
+def get_score(rank: int, winner: Tile) -> int:
+    if winner == Tile.EMPTY:
+        return 0 if rank == 1 else -1
+    else:
+        return 2 if rank == 1 else -1
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Tuple
+import random
+
+from .types import Tile
+
+ZOBRIST_SEED = 472
+
+class ZobristKeys:
+    __slots__ = ("board_size", "player_count", "tiles", "turns")
+
+    def __init__(self, board_size: int, player_count: int):
+        generator = random.Random(ZOBRIST_SEED ^ (board_size << 8) ^ player_count)
+
+        self.board_size = board_size
+        self.player_count = player_count
+        self.tiles: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(generator.getrandbits(64) for _ in range(board_size ** 2))
+            for _ in range(player_count + 1)
+        )
+        self.turns: Tuple[int, ...] = tuple(generator.getrandbits(64) for _ in range(player_count))
+
+    def key(self, tile: Tile, index: int) -> int:
+        return self.tiles[tile.value + 1][index]
+
+    def turn_key(self, tile: Tile) -> int:
+        return self.turns[tile.value]
+
+    def __repr__(self):
+        return f"ZobristKeys(board_size={self.board_size}, player_count={self.player_count})"
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(board_size: int, player_count: int) -> ZobristKeys:
+    return ZobristKeys(board_size=board_size, player_count=player_count)
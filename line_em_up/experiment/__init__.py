@@ -4,6 +4,7 @@ import threading
 import multiprocessing
 import os.path
 import logging
+from typing import List
 
 from line_em_up.server.config import ServerConfig
 
@@ -28,15 +29,16 @@ class ClientThread(threading.Thread):
         while not client.done:
             time.sleep(1)
 
-def play(url: str, parameters: Parameters):
-    res = requests.post(url + "api/new", json=parameters.to_dict())
+def create_games(url: str, parameters: List[Parameters]) -> List[int]:
+    res = requests.post(url + "api/new/bulk", json=[p.to_dict() for p in parameters])
     data = res.json()
 
     if 'error' in data:
-        raise Exception(f"Error while creating game: {data['error']}")
+        raise Exception(f"Error while creating games: {data['error']}")
 
-    game_id = data['game_id']
+    return data['game_ids']
 
+def play(url: str, game_id: int):
     client_threads = []
 
     for name in AI_NAMES:
@@ -62,9 +64,11 @@ def experiment(config: ServerConfig, parameters: Parameters):
 
     time.sleep(2)
 
-    for i, parameters in enumerate(parameters, 1):
+    game_ids = create_games(url=url, parameters=parameters)
+
+    for i, (game_id, parameters) in enumerate(zip(game_ids, parameters), 1):
         print("Experiment", i, "-", parameters.algorithm.name, "\n")
-        play(url=url, parameters=parameters)
+        play(url=url, game_id=game_id)
 
     server_process.terminate()
 
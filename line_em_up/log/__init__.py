@@ -1,9 +1,9 @@
-from ..common.sql import Game
+from ..common.sql import Game, GameSession, upgrade_schema
 from ..common import PlayerType, AlgorithmType, Tile, HeuristicType
 from .config import LogConfig
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, selectinload
 
 import string
 import itertools
@@ -27,10 +27,24 @@ def board_str(tiles, blocks, size):
 
     return '\n'.join(board_lines)
 
+def completed_games(db_session: any):
+    return (
+        db_session.query(Game)
+        .options(
+            selectinload(Game.archive),
+            selectinload(Game.sessions).selectinload(GameSession.player)
+        )
+        .filter(Game.complete == True)
+        .order_by(Game.id.asc())
+        .all()
+    )
+
 def make_game_traces(db_session: any, log_dir: str):
-    games = [game for game in db_session.query(Game).all() if game.complete]
+    games = completed_games(db_session)
 
     for game in games:
+        moves = game.moves
+        move_statistics = game.move_statistics
         log = []
 
         log.append(f"id={game.id}")
@@ -49,20 +63,18 @@ def make_game_traces(db_session: any, log_dir: str):
             size=game.board_size
         ))
         log.append("")
-        for i, move in enumerate(game.move_tiles):
-            log.append(f"Player {move.type.value} plays: {string.ascii_uppercase[move.x]}{string.ascii_lowercase[move.y]} (move #{i + 1})")
-            if move.statistics:
+        for i, ((x, y, tile), statistics) in enumerate(zip(moves, move_statistics)):
+            log.append(f"Player {tile.value} plays: {string.ascii_uppercase[x]}{string.ascii_lowercase[y]} (move #{i + 1})")
+            if statistics:
                 log.append("")
-                statistics = move.statistics[0]
-                log.append(f"i   Evaluation time: {sum(statistics.node_times)}s")
+                log.append(f"i   Evaluation time: {statistics.total_time}s")
                 log.append(f"ii  Heuristic evaluations: {sum(statistics.depth_counts)}")
                 log.append(f"iii Evaluations by depth: {statistics.depth_counts}")
                 log.append(f"iv  Average evaluation depth: {statistics.average_depth}")
                 log.append(f"v   Average recursion depth: {statistics.average_recursive_depth}")
             log.append("")
-            moves = game.moves[:i + 1]
             log.append(board_str(
-                tiles=moves,
+                tiles=moves[:i + 1],
                 blocks=game.blocks,
                 size=game.board_size
             ))
@@ -73,16 +85,16 @@ def make_game_traces(db_session: any, log_dir: str):
         else:
             log.append(f"The winner is {game.tile_winner.value}!")
 
-        all_statistics = [move.statistics[0] for move in game.move_tiles if move.statistics]
+        all_statistics = [statistics for statistics in move_statistics if statistics]
 
         if len(all_statistics) > 0:
             log.append("")
-            log.append(f"6(b)i   Average evaluation time: {sum(sum(statistics.node_times) for statistics in all_statistics) / len(all_statistics)}s")
+            log.append(f"6(b)i   Average evaluation time: {sum(statistics.total_time for statistics in all_statistics) / len(all_statistics)}s")
             log.append(f"6(b)ii  Total heuristic evaluations: {sum(sum(statistics.depth_counts) for statistics in all_statistics)}")
             log.append(f"6(b)iii Evaluations by depths: {[sum(dv) for dv in itertools.zip_longest(*[statistics.depth_counts for statistics in all_statistics], fillvalue=0)]}")
             log.append(f"6(b)iv  Average evaluation depth: {sum(statistics.average_depth for statistics in all_statistics) / len(all_statistics)}")
             log.append(f"6(b)v   Average recursion depth: {sum(statistics.average_recursive_depth for statistics in all_statistics) / len(all_statistics)}")
-            log.append(f"6(b)vi  Total moves: {len(game.moves)}")
+            log.append(f"6(b)vi  Total moves: {len(moves)}")
 
         with open(os.path.join(log_dir, f"gameTrace-{game.board_size}-{game.block_count}-{game.line_up_size}-{game.max_time}.{game.id}.txt"), "w") as h:
             h.write('\n'.join(log))
@@ -94,7 +106,7 @@ def chunks(lst, n):
         yield lst[i:i + n]
 
 def make_scoreboard(db_session: any, log_dir: str):
-    all_games = [game for game in db_session.query(Game).order_by(Game.id.asc()).all() if game.complete]
+    all_games = completed_games(db_session)
     sorted_games = list(zip(*list(chunks(all_games, 8))))
 
     for games in sorted_games:
@@ -131,13 +143,13 @@ def make_scoreboard(db_session: any, log_dir: str):
 
         stats_count = 0
         for game in games:
-            all_statistics = [move.statistics[0] for move in game.move_tiles if move.statistics]
+            all_statistics = [statistics for statistics in game.move_statistics if statistics]
 
             if len(all_statistics) == 0:
                 continue
 
             stats_count += 1
-            average_times += sum(sum(statistics.node_times) for statistics in all_statistics) / len(all_statistics)
+            average_times += sum(statistics.total_time for statistics in all_statistics) / len(all_statistics)
             evaluation_count += sum(sum(statistics.depth_counts) for statistics in all_statistics)
             game_depth_counts = [sum(dv) for dv in itertools.zip_longest(*[statistics.depth_counts for statistics in all_statistics], fillvalue=0)]
             depth_counts = [sum(dv) for dv in itertools.zip_longest(depth_counts, game_depth_counts, fillvalue=0)]
@@ -166,6 +178,7 @@ def log_main(config: LogConfig):
     engine = create_engine(
         f'sqlite:///{config.db}'
     )
+    upgrade_schema(engine)
     SessionMaker = sessionmaker(bind=engine)
 
     if not os.path.exists("./logs/"):
@@ -1,7 +1,45 @@
-from .config import ServerConfig
+from .config import ServerConfig, ScoresConfig, ArchiveConfig
 from .sever import Server
 
 def server_main(config: ServerConfig):
     server = Server(config)
 
     server.run()
+
+def scores_main(config: ScoresConfig):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from ..common.sql import upgrade_schema
+    from .handler import ServerHandler
+
+    engine = create_engine(f'sqlite:///{config.db}')
+    upgrade_schema(engine)
+
+    session = sessionmaker(bind=engine)()
+
+    try:
+        count = ServerHandler(session=session).rebuild_scores()
+    finally:
+        session.close()
+        engine.dispose()
+
+    print(f"Rebuilt scores for {count} players.")
+
+def archive_main(config: ArchiveConfig):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from ..common.sql import upgrade_schema
+    from .handler import ServerHandler
+
+    engine = create_engine(f'sqlite:///{config.db}')
+    upgrade_schema(engine)
+
+    session = sessionmaker(bind=engine)()
+
+    try:
+        count = ServerHandler(session=session).archive_games()
+    finally:
+        session.close()
+        engine.dispose()
+
+    print(f"Archived {count} completed games.")
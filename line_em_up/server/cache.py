@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+import hashlib
+import threading
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+class RenderCache:
+    __entries: "OrderedDict[Tuple[str, int], Tuple[Hashable, any]]"
+    __lock: threading.Lock
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 1024):
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, game_id: int, version: Hashable) -> any:
+        key = (kind, int(game_id))
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def put(self, kind: str, game_id: int, version: Hashable, value: any) -> any:
+        if self.max_size <= 0:
+            return value
+
+        key = (kind, int(game_id))
+
+        with self.__lock:
+            self.__entries[key] = (version, value)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+        return value
+
+    def get_or_render(self, kind: str, game_id: int, version: Hashable, render: Callable[[], any]) -> any:
+        value = self.get(kind, game_id, version)
+
+        if value is None:
+            value = self.put(kind, game_id, version, render())
+
+        return value
+
+    def invalidate(self, game_id: int, *kinds: str):
+        with self.__lock:
+            for kind in kinds:
+                self.__entries.pop((kind, int(game_id)), None)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+def make_etag(body: str) -> str:
+    return hashlib.sha1(body.encode()).hexdigest()
@@ -6,4 +6,26 @@ from dataclasses_json import dataclass_json
 class ServerConfig:
     debug: bool
     port: int
-    db: str
\ No newline at end of file
+    db: str
+    write_behind: bool = True
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    cache_size: int = -65536
+    mmap_size: int = 268435456
+    delta_broadcasts: bool = True
+    turn_timer: bool = True
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    render_cache_size: int = 1024
+    spectator_fps: float = 10
+
+@dataclass_json
+@dataclass
+class ScoresConfig:
+    db: str
+
+@dataclass_json
+@dataclass
+class ArchiveConfig:
+    db: str
@@ -1,20 +1,41 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import update
+from sqlalchemy import and_, or_, exists, func, distinct, insert
 from typing import Tuple, List
 import random
 import time
 
 from ..common.exceptions import LEMException
 from ..common.types import Tile, PlayerType
-from ..common.packets import Parameters, PlayPacket, MovePacket
-from ..common.sql import GameSession, Game, Player, GameTile, Statistics
+from ..common.packets import Parameters, PlayPacket, LeanPlayPacket, MovePacket, DeltaPacket
+from ..common.utils import tile_to_emoji
+from ..common.sql import GameSession, Game, Player, GameTile, GameArchive, PlayerScore
+from .registry import GameRegistry, LiveGame, LiveSession
+from .timer import TurnScheduler
+from .persistence import GameWriter, SyncWriter, Record, MoveRecord, GameRecord, ScoreRecord, archive_game
+
+OPEN_GAMES_LIMIT = 100
+PAGE_SIZE = 50
+BULK_GAMES_LIMIT = 10000
+TIME_BUFFER = 10
 
 class ServerHandler:
     session: Session
-
-    def __init__(self, session: Session):
+    registry: GameRegistry
+    writer: GameWriter
+    scheduler: TurnScheduler
+    _records: List[Record]
+    _move: Tuple[int, int, Tile]
+    delta: DeltaPacket
+
+    def __init__(self, session: Session, registry: GameRegistry = None, writer: GameWriter = None, scheduler: TurnScheduler = None):
         self.session = session
+        self.scheduler = scheduler
+        self.registry = registry if registry is not None else GameRegistry()
+        self.writer = writer if writer is not None else SyncWriter(session=session, registry=self.registry)
+        self._records = []
+        self._move = None
+        self.delta = None
 
     def _commit(self):
         self.session.commit()
@@ -28,22 +49,77 @@ class ServerHandler:
     def get_game(self, game_id: str) -> Game:
         return self.session.query(Game).filter(Game.id == game_id).first()
 
+    def get_live_game(self, game_id: str, register: bool = True) -> LiveGame:
+        game = self.registry.get(game_id)
+
+        if game is None:
+            db_game = self.get_game(game_id=game_id)
+
+            if db_game is None:
+                return None
+
+            game = self.registry.load(db_game, register=register)
+
+        return game
+
+    def get_live_session(self, socket_id: str) -> LiveSession:
+        game = self.registry.get_by_socket(socket_id)
+
+        if game is None:
+            session = self.get_session(socket_id=socket_id)
+
+            if session is None:
+                return None
+
+            game = self.registry.load(session.game)
+
+        return game.sessions.get(socket_id)
+
     def get_games(self) -> List[Game]:
         return self.session.query(Game).all()
 
-    def get_active_games(self) -> List[Game]:
-        return self.session.query(Game).filter(Game.listed == True, Game.complete == False).all()
+    def _get_game_page(self, query: any, after: int = None, limit: int = PAGE_SIZE) -> List[Game]:
+        if after is not None:
+            query = query.filter(Game.id > after)
 
-    def get_open_games(self, player_name: str = None) -> List[Game]:
-        open_games = list(filter(lambda game: not game.started, self.session.query(Game).filter(Game.listed == True, Game.complete == False).all()))
+        return (
+            query.options(selectinload(Game.sessions).joinedload(GameSession.player))
+            .order_by(Game.id)
+            .limit(limit)
+            .all()
+        )
+
+    def get_active_games(self, after: int = None, limit: int = PAGE_SIZE) -> List[Game]:
+        return self._get_game_page(self.session.query(Game).filter(Game.listed == True, Game.complete == False), after=after, limit=limit)
+
+    def get_open_games(self, player_name: str = None, after: int = None, limit: int = OPEN_GAMES_LIMIT) -> List[int]:
+        query = (
+            self.session.query(Game.id)
+            .outerjoin(GameSession, GameSession.game_id == Game.id)
+            .filter(Game.listed == True, Game.complete == False)
+        )
+
+        if after is not None:
+            query = query.filter(Game.id > after)
 
         if player_name:
-            open_games = list(filter(lambda game: not any(session.player.name == player_name for session in game.sessions), open_games))
+            joined = aliased(GameSession)
+            player_ids = self.session.query(Player.id).filter(Player.name == player_name).scalar_subquery()
+            query = query.filter(~exists().where(and_(joined.game_id == Game.id, joined.player_id.in_(player_ids))))
+
+        query = (
+            query.group_by(Game.id)
+            .having(func.count(distinct(GameSession.player_id)) < Game.max_player_count)
+            .order_by(Game.id)
+        )
+
+        if limit:
+            query = query.limit(limit)
 
-        return open_games
+        return [game_id for game_id, in query]
 
-    def get_completed_games(self) -> List[Game]:
-        return self.session.query(Game).filter(Game.complete == True).all()
+    def get_completed_games(self, after: int = None, limit: int = PAGE_SIZE) -> List[Game]:
+        return self._get_game_page(self.session.query(Game).filter(Game.complete == True), after=after, limit=limit)
 
     def get_player(self, player_id: str = None, player_name: str = None) -> Player:
         if player_id:
@@ -56,23 +132,105 @@ class ServerHandler:
     def get_players(self) -> List[Player]:
         return self.session.query(Player).all()
 
+    def get_leaderboard(self, after: Tuple[int, int] = None, limit: int = PAGE_SIZE) -> List[PlayerScore]:
+        query = self.session.query(PlayerScore).options(joinedload(PlayerScore.player))
+
+        if after is not None:
+            score, player_id = after
+            query = query.filter(
+                PlayerScore.score <= score,
+                or_(PlayerScore.score < score, PlayerScore.player_id > player_id)
+            )
+
+        return (
+            query.order_by(PlayerScore.score.desc(), PlayerScore.player_id)
+            .limit(limit)
+            .all()
+        )
+
+    def get_player_sessions(self, player_id: str, after: int = None, limit: int = PAGE_SIZE) -> List[GameSession]:
+        session_ids = self.session.query(func.min(GameSession.id)).filter(GameSession.player_id == player_id)
+
+        if after is not None:
+            session_ids = session_ids.filter(GameSession.game_id > after)
+
+        session_ids = (
+            session_ids.group_by(GameSession.game_id)
+            .order_by(GameSession.game_id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+
+        return (
+            self.session.query(GameSession)
+            .options(joinedload(GameSession.game))
+            .filter(GameSession.id.in_(session_ids))
+            .order_by(GameSession.game_id)
+            .all()
+        )
+
+    def rebuild_scores(self):
+        records = {player_id: PlayerScore(player_id=player_id) for player_id, in self.session.query(Player.id)}
+
+        games = (
+            self.session.query(Game)
+            .options(selectinload(Game.sessions))
+            .filter(Game.complete == True)
+            .yield_per(PAGE_SIZE)
+        )
+
+        for game in games:
+            seen_ids = set()
+
+            for session in game.sessions:
+                if session.player_id in seen_ids:
+                    continue
+
+                seen_ids.add(session.player_id)
+                records[session.player_id].add_result(session.rank, game.tile_winner)
+
+        self.session.query(PlayerScore).delete()
+        self.session.add_all(records.values())
+        self._commit()
+
+        return len(records)
+
+    def archive_games(self) -> int:
+        game_ids = [
+            game_id for game_id, in
+            self.session.query(Game.id)
+            .outerjoin(GameArchive)
+            .filter(Game.complete == True, GameArchive.game_id == None)
+        ]
+
+        for i, game_id in enumerate(game_ids, 1):
+            archive_game(self.session, game_id)
+
+            if i % PAGE_SIZE == 0:
+                self._commit()
+
+        self._commit()
+
+        return len(game_ids)
+
     def _get_random_block_positions(self, block_count: int, board_size: int):
-        blocks = []
-        block_indicies = random.sample(list(range(board_size ** 2)), k=block_count)
-        for block_index in block_indicies:
-            x, y = block_index % board_size, block_index // board_size
-            blocks.append((x, y))
-        
-        return blocks
+        return [(index % board_size, index // board_size) for index in random.sample(range(board_size ** 2), k=block_count)]
 
-    def _create_blocks(self, game_id: str, block_count: int, blocks: List[Tuple[int, int]], board_size: int):
+    def _get_block_positions(self, block_count: int, blocks: List[Tuple[int, int]], board_size: int) -> List[Tuple[int, int]]:
         if blocks:
-            target_blocks = blocks
-        else:
-            target_blocks = self._get_random_block_positions(
-                block_count=block_count,
-                board_size=board_size
-            )
+            return list(dict.fromkeys(tuple(block) for block in blocks))
+
+        return self._get_random_block_positions(
+            block_count=block_count,
+            board_size=board_size
+        )
+
+    def _create_blocks(self, game_id: str, block_count: int, blocks: List[Tuple[int, int]], board_size: int):
+        target_blocks = self._get_block_positions(
+            block_count=block_count,
+            blocks=blocks,
+            board_size=board_size
+        )
 
         tiles = []
         for x, y in target_blocks:
@@ -86,10 +244,7 @@ class ServerHandler:
 
         self.session.add_all(tiles)
 
-    def create_game(self, parameters: Parameters) -> Game:
-        block_count = parameters.block_count
-        blocks = parameters.blocks
-
+    def _new_game(self, parameters: Parameters) -> Game:
         nd = parameters.to_dict()
 
         if 'block_count' in nd:
@@ -97,7 +252,13 @@ class ServerHandler:
         if 'blocks' in nd:
             del nd['blocks']
 
-        game = Game(**nd)
+        return Game(**nd)
+
+    def create_game(self, parameters: Parameters) -> Game:
+        block_count = parameters.block_count
+        blocks = parameters.blocks
+
+        game = self._new_game(parameters)
 
         self.session.add(game)
         self._flush()
@@ -112,6 +273,44 @@ class ServerHandler:
 
         return game
 
+    def create_games(self, parameters: List[Parameters]) -> List[int]:
+        if len(parameters) < 1:
+            raise LEMException("Cannot create fewer than 1 game.")
+        if len(parameters) > BULK_GAMES_LIMIT:
+            raise LEMException(f"Cannot create more than {BULK_GAMES_LIMIT} games at once.")
+
+        first_id = (self.session.query(func.max(Game.id)).scalar() or 0) + 1
+        game_ids = list(range(first_id, first_id + len(parameters)))
+        games = []
+        tiles = []
+
+        for game_id, game_parameters in zip(game_ids, parameters):
+            game = self._new_game(game_parameters)
+            game.id = game_id
+            games.append(game)
+
+            blocks = self._get_block_positions(
+                block_count=game_parameters.block_count,
+                blocks=game_parameters.blocks,
+                board_size=game_parameters.board_size
+            )
+
+            tiles.extend(dict(game_id=game_id, x=x, y=y, type=Tile.BLOCK) for x, y in blocks)
+
+        try:
+            self.session.add_all(games)
+            self._flush()
+
+            if tiles:
+                self.session.execute(insert(GameTile), tiles)
+
+            self._commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise LEMException("Games were created concurrently, try again.")
+
+        return game_ids
+
     def has_player(self, player_name: str) -> bool:
         return len(self.session.query(Player).filter(Player.name == player_name).all()) > 0
     
@@ -119,6 +318,7 @@ class ServerHandler:
         player = Player(
             name=player_name
         )
+        player.record = PlayerScore()
 
         self.session.add(player)
         self._commit()
@@ -126,137 +326,253 @@ class ServerHandler:
         return player
 
     def create_session(self, socket_id: str, player_type: PlayerType, game_id: str, player_id: str) -> GameSession:
-        game = self.get_game(game_id=game_id)
-
-        session = GameSession(
-            game_id=game_id,
-            player_id=player_id,
-            socket_id=socket_id,
-            player_type=player_type,
-            tile=game.get_player_tile(player_id=player_id)
-        )
+        game = self.get_live_game(game_id=game_id)
 
-        self.session.add(session)
-        self._commit()
+        with game.lock:
+            session = GameSession(
+                game_id=game_id,
+                player_id=player_id,
+                socket_id=socket_id,
+                player_type=player_type,
+                tile=game.get_player_tile(player_id=player_id)
+            )
+
+            self.session.add(session)
+            self._commit()
+
+            self.registry.add_session(game_id, LiveSession.from_session(session, game))
 
         return session
 
     def get_play_packet(self, socket_id: str) -> PlayPacket:
-        session = self.get_session(socket_id=socket_id)
+        return self.get_snapshot_packet(game=self.get_live_session(socket_id=socket_id).game)
 
+    @staticmethod
+    def get_snapshot_packet(game: LiveGame) -> PlayPacket:
         return PlayPacket(
-            tile=session.game.tile_turn,
-            emoji_board=session.game.pretty_board,
-            moves=session.game.moves,
-            blocks=session.game.blocks,
-            order=session.game.tile_order
+            tile=game.tile_turn,
+            emoji_board=game.pretty_board,
+            moves=game.moves,
+            blocks=game.blocks,
+            order=game.tile_order,
+            seq=game.seq
         )
 
-    def _handle_win(self, session: GameSession):
-        if not session.game.check_complete(): 
-            return False
-
-        self.session.execute(
-            update(Game)
-            .where(Game.id == session.game.id)
-            .values(
-                tile_turn=Tile.EMPTY,
-                tile_winner=session.game.tile_winner,
-                complete=True
-            )
+    @staticmethod
+    def get_lean_snapshot_packet(game: LiveGame) -> LeanPlayPacket:
+        return LeanPlayPacket.from_board(
+            board=game.board,
+            tile=game.tile_turn,
+            order=game.tile_order,
+            seq=game.seq
         )
-        self._commit()
 
-        return True
+    def arm_turn(self, game: LiveGame):
+        if self.scheduler is None or not game.started:
+            return
 
-    def _handle_next_move(self, session: GameSession):
-        self.session.execute(
-            update(Game)
-            .where(Game.id == session.game.id)
-            .values(
-                tile_turn=session.game.next_tile,
-                last_time=time.time()
-            )
-        )
-        self._commit()
+        if game.complete:
+            self.scheduler.disarm(game.id)
+            return
 
-    def _handle_invalid_play(self, session: GameSession, message: str):
-        if session.player_type == PlayerType.AI:
-            session.game.add_loser(session.tile)
-            self.session.execute(
-                update(Game)
-                .where(Game.id == session.game.id)
-                .values(
-                    _tile_losers=','.join(str(tile.value) for tile in session.game.tile_losers)
-                )
-            )
-            self._commit()
+        start = game.last_time if game.last_time is not None else time.time()
+        self.scheduler.arm(game.id, game.seq, start + game.max_time + TIME_BUFFER)
 
-            if not self._handle_win(session=session):
-                self._handle_next_move(session=session)
+    def arm_active_games(self) -> int:
+        if self.scheduler is None:
+            return 0
 
-        raise LEMException(message)
+        games = self.session.query(Game.id, Game.last_time, Game.max_time).filter(Game.complete == False, Game.last_time != None)
 
-    def _is_tile_empty(self, game_id: str, coordinate: Tuple[int, int]) -> bool:
-        return len(self.session.query(GameTile).filter(GameTile.game_id == game_id, GameTile.x == coordinate[0], GameTile.y == coordinate[1]).all()) == 0
+        count = 0
+        for game_id, last_time, max_time in games:
+            self.scheduler.arm(game_id, None, last_time + max_time + TIME_BUFFER)
+            count += 1
 
-    def play(self, socket_id: str, packet: MovePacket) -> GameSession:
-        play_time = time.time()
+        return count
 
-        session = self.get_session(socket_id=socket_id)
+    def expire_turn(self, game_id: int, seq: int = None) -> LiveSession:
+        game = self.get_live_game(game_id=game_id)
 
-        if not session.game.started:
-            raise LEMException("Game not started.")
+        if game is None:
+            return None
 
-        if session.game.complete:
-            raise LEMException("Game complete.")
-    
-        if not session.game.tile_turn == session.tile:
-            raise LEMException("Not player turn.")
+        with game.lock:
+            if game.complete or not game.started:
+                return None
 
-        if not session.game.last_time == None:
-            # TODO: Better server transfer buffer?
-            if session.player_type == PlayerType.AI and play_time - session.game.last_time > session.game.max_time + 10:
-                self._handle_invalid_play(
-                    session=session,
-                    message="Too slow."
-                )
+            if seq is not None and not game.seq == seq:
+                return None
+
+            if game.last_time is not None and time.time() - game.last_time <= game.max_time + TIME_BUFFER:
+                return None
 
-        coordinate = packet.move
+            session = next((session for session in game.sessions.values() if session.tile == game.tile_turn), None)
 
-        for p in coordinate:
-            if p < 0 or p >= session.game.board_size:
+            if session is None or not session.player_type == PlayerType.AI:
+                return None
+
+            self._move = None
+            self.delta = None
+
+            try:
                 self._handle_invalid_play(
                     session=session,
-                    message="Invalid move."
+                    message="Too slow."
                 )
+            except LEMException:
+                pass
+            finally:
+                self._commit_records()
 
-        if not self._is_tile_empty(game_id=session.game.id, coordinate=coordinate):
-            self._handle_invalid_play(
-                session=session,
-                message="Tile not empty."
-            )
+            return session
+
+    def _publish(self, game: LiveGame):
+        game.seq += 1
+        self.arm_turn(game)
 
-        move = GameTile(
-            game_id=session.game.id,
-            x=coordinate[0],
-            y=coordinate[1],
-            type=session.tile
+        self._records.append(GameRecord(
+            game_id=game.id,
+            values=dict(seq=game.seq)
+        ))
+
+        self.delta = DeltaPacket(
+            seq=game.seq,
+            tile=game.tile_turn,
+            order=game.tile_order,
+            move=self._move,
+            emoji=tile_to_emoji(self._move[2]) if self._move else None
         )
 
-        self.session.add(move)
-        self._commit()
+    def _handle_win(self, session: LiveSession, x: int = None, y: int = None):
+        game = session.game
+
+        if not game.check_complete(x=x, y=y, tile=session.tile if x is not None else None):
+            return False
+
+        game.tile_turn = Tile.EMPTY
+        game.complete = True
+
+        self._records.append(GameRecord(
+            game_id=game.id,
+            values=dict(
+                tile_turn=Tile.EMPTY,
+                tile_winner=game.tile_winner,
+                complete=True
+            ),
+            complete=True
+        ))
+
+        for player_session in game.unique_sessions:
+            self._records.append(ScoreRecord(
+                game_id=game.id,
+                player_id=player_session.player_id,
+                rank=player_session.rank,
+                winner=game.tile_winner
+            ))
+
+        self._publish(game)
+
+        return True
 
-        if packet.statistics:
-            statistics = Statistics(
-                tile_id=move.id,
-                **packet.statistics.to_dict()
+    def _handle_next_move(self, session: LiveSession):
+        game = session.game
+
+        game.tile_turn = game.next_tile
+        game.last_time = time.time()
+
+        self._records.append(GameRecord(
+            game_id=game.id,
+            values=dict(
+                tile_turn=game.tile_turn,
+                last_time=game.last_time
             )
+        ))
 
-            self.session.add(statistics)
-            self._commit()
+        self._publish(game)
+
+    def _handle_invalid_play(self, session: LiveSession, message: str):
+        if session.player_type == PlayerType.AI:
+            session.game.add_loser(session.tile)
+
+            self._records.append(GameRecord(
+                game_id=session.game.id,
+                values=dict(
+                    _tile_losers=','.join(str(tile.value) for tile in session.game.tile_losers)
+                )
+            ))
 
-        if not self._handle_win(session=session):
-            self._handle_next_move(session=session)
+            if not self._handle_win(session=session):
+                self._handle_next_move(session=session)
+
+        raise LEMException(message)
+
+    def _commit_records(self):
+        records, self._records = self._records, []
+
+        if len(records) > 0:
+            self.writer.submit(records)
+
+    def play(self, socket_id: str, packet: MovePacket) -> LiveSession:
+        play_time = time.time()
+        self._move = None
+        self.delta = None
+
+        session = self.get_live_session(socket_id=socket_id)
+
+        if not session:
+            raise LEMException("No session.")
+
+        game = session.game
+
+        with game.lock:
+            try:
+                if not game.started:
+                    raise LEMException("Game not started.")
+
+                if game.complete:
+                    raise LEMException("Game complete.")
+
+                if not game.tile_turn == session.tile:
+                    raise LEMException("Not player turn.")
+
+                if not game.last_time == None:
+                    # TODO: Better server transfer buffer?
+                    if session.player_type == PlayerType.AI and play_time - game.last_time > game.max_time + TIME_BUFFER:
+                        self._handle_invalid_play(
+                            session=session,
+                            message="Too slow."
+                        )
+
+                x, y = packet.move
+
+                for p in (x, y):
+                    if p < 0 or p >= game.board_size:
+                        self._handle_invalid_play(
+                            session=session,
+                            message="Invalid move."
+                        )
+
+                if not game.board.is_empty(x, y):
+                    self._handle_invalid_play(
+                        session=session,
+                        message="Tile not empty."
+                    )
+
+                game.board.make(x, y, session.tile)
+                self._move = (x, y, session.tile)
+
+                self._records.append(MoveRecord(
+                    game_id=game.id,
+                    x=x,
+                    y=y,
+                    tile=session.tile,
+                    statistics=packet.statistics.to_dict() if packet.statistics else None
+                ))
+
+                if not self._handle_win(session=session, x=x, y=y):
+                    self._handle_next_move(session=session)
+            finally:
+                self._commit_records()
 
         return session
@@ -0,0 +1,84 @@
+from sqlalchemy.pool import QueuePool
+from typing import Dict
+import threading
+import time
+
+class PoolMetrics:
+    __lock: threading.Lock
+    checkouts: int
+    wait_total: float
+    wait_max: float
+    timeouts: int
+    connects: int
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0
+        self.wait_max = 0
+        self.timeouts = 0
+        self.connects = 0
+
+    def record_wait(self, elapsed: float):
+        with self.__lock:
+            self.checkouts += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+    def record_timeout(self):
+        with self.__lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self.__lock:
+            self.connects += 1
+
+    @property
+    def wait_average(self) -> float:
+        return self.wait_total / self.checkouts if self.checkouts > 0 else 0
+
+    def to_dict(self, pool: any = None) -> Dict[str, any]:
+        d = {
+            "checkouts": self.checkouts,
+            "wait_average": self.wait_average,
+            "wait_max": self.wait_max,
+            "timeouts": self.timeouts,
+            "connects": self.connects
+        }
+
+        if isinstance(pool, QueuePool):
+            d["size"] = pool.size()
+            d["checked_in"] = pool.checkedin()
+            d["checked_out"] = pool.checkedout()
+            d["overflow"] = pool.overflow()
+
+        return d
+
+class MeteredQueuePool(QueuePool):
+    def __init__(self, creator: any, metrics: PoolMetrics = None, **kw):
+        QueuePool.__init__(self, creator, **kw)
+        self.metrics = metrics if metrics is not None else PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            connection = QueuePool._do_get(self)
+        except Exception:
+            self.metrics.record_timeout()
+            raise
+
+        self.metrics.record_wait(time.perf_counter() - start)
+
+        return connection
+
+    def _create_connection(self):
+        self.metrics.record_connect()
+
+        return QueuePool._create_connection(self)
+
+    def recreate(self):
+        pool = QueuePool.recreate(self)
+        pool.metrics = self.metrics
+
+        return pool
@@ -0,0 +1,256 @@
+from dataclasses import dataclass, field
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import update, delete, select, func
+from sqlalchemy.dialects.sqlite import insert
+from typing import Callable, Dict, List, Union
+import logging
+import queue
+import threading
+
+from ..common.exceptions import LEMException
+from ..common.types import Tile
+from ..common.sql import Game, GameTile, GameArchive, Statistics, PlayerScore
+from .registry import GameRegistry
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class MoveRecord:
+    game_id: int
+    x: int
+    y: int
+    tile: Tile
+    statistics: Dict[str, any] = None
+
+@dataclass
+class GameRecord:
+    game_id: int
+    values: Dict[str, any] = field(default_factory=dict)
+    complete: bool = False
+
+@dataclass
+class ScoreRecord:
+    game_id: int
+    player_id: int
+    rank: int
+    winner: Tile
+
+Record = Union[MoveRecord, GameRecord, ScoreRecord]
+
+def merge_records(records: List[Record]) -> List[Record]:
+    merged = []
+    games = {}
+
+    for record in records:
+        if isinstance(record, GameRecord):
+            if record.game_id in games:
+                game = games[record.game_id]
+                game.values.update(record.values)
+                game.complete = game.complete or record.complete
+                continue
+
+            record = GameRecord(game_id=record.game_id, values=dict(record.values), complete=record.complete)
+            games[record.game_id] = record
+
+        merged.append(record)
+
+    return merged
+
+def archive_game(session: Session, game_id: int) -> GameArchive:
+    game = (
+        session.query(Game)
+        .options(
+            selectinload(Game.archive),
+            selectinload(Game.tiles).selectinload(GameTile.statistics)
+        )
+        .populate_existing()
+        .filter(Game.id == game_id)
+        .one()
+    )
+
+    if game.archived:
+        return game.archive
+
+    archive = GameArchive.from_game(game)
+    tile_count = session.query(func.count(GameTile.id)).filter(GameTile.game_id == game_id).scalar()
+
+    if tile_count != len(archive.moves) + len(archive.blocks):
+        raise LEMException(f"Archive of game {game_id} holds {len(archive.moves) + len(archive.blocks)} of {tile_count} tiles.")
+
+    session.add(archive)
+
+    tile_ids = select(GameTile.id).where(GameTile.game_id == game_id)
+    session.execute(delete(Statistics).where(Statistics.tile_id.in_(tile_ids)).execution_options(synchronize_session=False))
+    session.execute(delete(GameTile).where(GameTile.game_id == game_id).execution_options(synchronize_session=False))
+    session.expire(game, ["tiles"])
+
+    return archive
+
+def apply_record(session: Session, record: Record):
+    if isinstance(record, MoveRecord):
+        tile = GameTile(
+            game_id=record.game_id,
+            x=record.x,
+            y=record.y,
+            type=record.tile
+        )
+
+        if record.statistics:
+            tile.statistics.append(Statistics(**record.statistics))
+
+        session.add(tile)
+    elif isinstance(record, GameRecord):
+        session.execute(
+            update(Game)
+            .where(Game.id == record.game_id)
+            .values(**record.values)
+        )
+
+        if record.complete:
+            archive_game(session, record.game_id)
+    elif isinstance(record, ScoreRecord):
+        values = PlayerScore.get_result(record.rank, record.winner)
+
+        session.execute(
+            insert(PlayerScore)
+            .values(player_id=record.player_id, **values)
+            .on_conflict_do_update(
+                index_elements=[PlayerScore.player_id],
+                set_={key: getattr(PlayerScore, key) + value for key, value in values.items()}
+            )
+        )
+
+class GameWriter:
+    def submit(self, records: List[Record]):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class SyncWriter(GameWriter):
+    __session: Session
+    __registry: GameRegistry
+
+    def __init__(self, session: Session, registry: GameRegistry):
+        self.__session = session
+        self.__registry = registry
+
+    def submit(self, records: List[Record]):
+        records = merge_records(records)
+
+        try:
+            for record in records:
+                apply_record(self.__session, record)
+            self.__session.commit()
+        except:
+            self.__session.rollback()
+
+            for record in records:
+                self.__registry.release(record.game_id)
+
+            raise
+
+        for record in records:
+            if isinstance(record, GameRecord) and record.complete:
+                self.__registry.release(record.game_id)
+
+class WriteBehind(GameWriter):
+    __session_maker: Callable[[], Session]
+    __registry: GameRegistry
+    __queue: queue.Queue
+    __batch_size: int
+    __interval: float
+    __thread: threading.Thread
+
+    def __init__(self, session_maker: Callable[[], Session], registry: GameRegistry, batch_size: int = 256, interval: float = 0.05):
+        self.__session_maker = session_maker
+        self.__registry = registry
+        self.__queue = queue.Queue()
+        self.__batch_size = batch_size
+        self.__interval = interval
+        self.__thread = threading.Thread(target=self.__run, name="write-behind", daemon=True)
+        self.__thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    def submit(self, records: List[Record]):
+        self.__queue.put(merge_records(records))
+
+    def __next_batch(self) -> List[List[Record]]:
+        batch = [self.__queue.get()]
+
+        while len(batch) < self.__batch_size:
+            try:
+                batch.append(self.__queue.get(timeout=self.__interval if len(batch) == 1 else 0))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def __commit(self, units: List[List[Record]]):
+        session = self.__session_maker()
+
+        try:
+            for records in units:
+                for record in records:
+                    apply_record(session, record)
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        for records in units:
+            for record in records:
+                if isinstance(record, GameRecord) and record.complete:
+                    self.__registry.release(record.game_id)
+
+    def __write(self, batch: List[List[Record]]):
+        units = [records for records in batch if records]
+
+        try:
+            self.__commit(units)
+            return
+        except Exception:
+            logger.exception("Write-behind batch of %d units failed, retrying unit by unit.", len(units))
+
+        failed = set()
+
+        for records in units:
+            game_ids = {record.game_id for record in records}
+
+            if game_ids & failed:
+                continue
+
+            try:
+                self.__commit([records])
+            except Exception:
+                logger.exception("Write-behind unit for games %s failed, reloading them from the database.", sorted(game_ids))
+                failed |= game_ids
+
+        for game_id in failed:
+            self.__registry.release(game_id)
+
+    def __run(self):
+        while True:
+            batch = self.__next_batch()
+            self.__write(batch)
+
+            for _ in batch:
+                self.__queue.task_done()
+
+            if None in batch:
+                return
+
+    def flush(self):
+        self.__queue.join()
+
+    def close(self):
+        self.__queue.put(None)
+        self.__thread.join()
@@ -0,0 +1,258 @@
+from typing import Dict, List, Union
+import threading
+
+from ..common.board import BitBoard
+from ..common.types import Tile, PlayerType
+from ..common.utils import tile_to_emoji, get_rank
+from ..common.sql import Game, GameSession
+
+class LiveSession:
+    socket_id: str
+    player_id: int
+    player_name: str
+    player_type: PlayerType
+    tile: Tile
+    game: "LiveGame"
+
+    def __init__(self, socket_id: str, player_id: int, player_name: str, player_type: PlayerType, tile: Tile, game: "LiveGame"):
+        self.socket_id = socket_id
+        self.player_id = player_id
+        self.player_name = player_name
+        self.player_type = player_type
+        self.tile = tile
+        self.game = game
+
+    @classmethod
+    def from_session(cls, session: GameSession, game: "LiveGame") -> "LiveSession":
+        return LiveSession(
+            socket_id=session.socket_id,
+            player_id=session.player.id,
+            player_name=session.player.name,
+            player_type=session.player_type,
+            tile=session.tile,
+            game=game
+        )
+
+    @property
+    def is_turn(self) -> bool:
+        return self.game.tile_turn == self.tile
+
+    @property
+    def rank(self) -> int:
+        return self.game.get_rank(self.tile)
+
+    def __repr__(self):
+        return f"LiveSession(game_id={self.game.id}, player_id={self.player_id}, socket_id={self.socket_id})"
+
+class LiveGame:
+    id: int
+    board_size: int
+    line_up_size: int
+    max_player_count: int
+    max_time: float
+    board: BitBoard
+    sessions: Dict[str, LiveSession]
+    tile_turn: Tile
+    tile_winner: Tile
+    tile_losers: List[Tile]
+    last_time: float
+    complete: bool
+    seq: int
+    lock: threading.RLock
+
+    def __init__(self, game: Game):
+        self.id = game.id
+        self.board_size = game.board_size
+        self.line_up_size = game.line_up_size
+        self.max_player_count = game.max_player_count
+        self.max_time = game.max_time
+        self.board = game.bitboard.copy()
+        self.tile_turn = game.tile_turn
+        self.tile_winner = game.tile_winner
+        self.tile_losers = game.tile_losers
+        self.last_time = game.last_time
+        self.complete = game.complete
+        self.seq = game.seq if game.seq is not None else len(self.board.history) + len(self.tile_losers)
+        self.sessions = {}
+        self.lock = threading.RLock()
+
+        for session in game.sessions:
+            self.add_session(LiveSession.from_session(session, self))
+
+    def add_session(self, session: LiveSession):
+        session.game = self
+        self.sessions[session.socket_id] = session
+
+    @property
+    def unique_sessions(self) -> List[LiveSession]:
+        seen_ids = set()
+        sessions = []
+
+        for session in self.sessions.values():
+            if not session.player_id in seen_ids:
+                seen_ids.add(session.player_id)
+                sessions.append(session)
+
+        return sessions
+
+    @property
+    def player_count(self) -> int:
+        return len(self.unique_sessions)
+
+    def get_player_tile(self, player_id: int) -> Tile:
+        for session in self.sessions.values():
+            if session.player_id == player_id:
+                return session.tile
+
+        return Tile(self.player_count)
+
+    @property
+    def started(self) -> bool:
+        return self.player_count >= self.max_player_count
+
+    @property
+    def player_tiles(self) -> List[Tile]:
+        return [tile for tile in Tile if tile.value >= 0 and tile.value < self.max_player_count]
+
+    @property
+    def tile_order(self) -> List[Tile]:
+        return [tile for tile in self.player_tiles if not tile in self.tile_losers]
+
+    @property
+    def next_tile(self) -> Tile:
+        tiles = self.player_tiles
+        i = tiles.index(self.tile_turn)
+
+        while True:
+            i = (i + 1) % len(tiles)
+            tile = tiles[i]
+
+            if not tile in self.tile_losers:
+                return tile
+
+    @property
+    def moves(self):
+        return self.board.history
+
+    @property
+    def blocks(self):
+        return self.board.blocks
+
+    @property
+    def pretty_board(self) -> List[List[str]]:
+        return [[tile_to_emoji(v) for v in row] for row in self.board.to_tile_board()]
+
+    def get_rank(self, tile: Tile) -> int:
+        return get_rank(
+            tile=tile,
+            winner=self.tile_winner,
+            losers=self.tile_losers,
+            max_player_count=self.max_player_count,
+            complete=self.complete
+        )
+
+    @property
+    def ranks(self) -> Dict[int, int]:
+        return {session.player_id: session.rank for session in self.unique_sessions}
+
+    def add_loser(self, tile: Tile):
+        if tile in self.tile_losers: return
+        self.tile_losers = [tile] + self.tile_losers
+
+    def check_complete(self, x: int = None, y: int = None, tile: Tile = None) -> bool:
+        if self.complete:
+            return True
+
+        if len(self.tile_losers) >= self.max_player_count - 1:
+            for player_tile in self.player_tiles:
+                if not player_tile in self.tile_losers:
+                    self.tile_winner = player_tile
+                    break
+            return True
+
+        if tile is not None and self.board.is_win(tile, x, y):
+            self.tile_winner = tile
+            return True
+
+        if self.board.is_full:
+            return True
+
+        return False
+
+    def __repr__(self):
+        return f"LiveGame(id={self.id}, board_size={self.board_size}, started={self.started}, turn={self.tile_turn}, complete={self.complete})"
+
+class GameRegistry:
+    __games: Dict[int, LiveGame]
+    __sockets: Dict[str, int]
+    __released_seqs: Dict[int, int]
+    __lock: threading.RLock
+
+    def __init__(self):
+        self.__games = {}
+        self.__sockets = {}
+        self.__released_seqs = {}
+        self.__lock = threading.RLock()
+
+    def get(self, game_id: int) -> Union[LiveGame, None]:
+        with self.__lock:
+            return self.__games.get(int(game_id))
+
+    def get_by_socket(self, socket_id: str) -> Union[LiveGame, None]:
+        with self.__lock:
+            game_id = self.__sockets.get(socket_id)
+
+            if game_id is None:
+                return None
+
+            return self.__games.get(game_id)
+
+    def load(self, game: Game, register: bool = True) -> LiveGame:
+        with self.__lock:
+            if game.id in self.__games:
+                return self.__games[game.id]
+
+            live = LiveGame(game)
+
+            if game.id in self.__released_seqs:
+                live.seq = max(live.seq, self.__released_seqs[game.id] + 1)
+
+            if live.complete or not register:
+                return live
+
+            self.__released_seqs.pop(game.id, None)
+            self.__games[game.id] = live
+
+            for socket_id in live.sessions:
+                self.__sockets[socket_id] = live.id
+
+            return live
+
+    def add_session(self, game_id: int, session: LiveSession):
+        with self.__lock:
+            game = self.__games.get(int(game_id))
+
+            if game is None:
+                return
+
+            game.add_session(session)
+            self.__sockets[session.socket_id] = game.id
+
+    def release(self, game_id: int):
+        with self.__lock:
+            game = self.__games.pop(int(game_id), None)
+
+            if game is None:
+                return
+
+            if not game.complete:
+                self.__released_seqs[game.id] = game.seq
+
+            for socket_id in game.sessions:
+                self.__sockets.pop(socket_id, None)
+
+    def __len__(self) -> int:
+        return len(self.__games)
+
+    def __contains__(self, game_id: int) -> bool:
+        return int(game_id) in self.__games
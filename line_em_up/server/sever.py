@@ -1,16 +1,25 @@
-from flask import Flask, render_template, request, redirect
+from flask import Flask, render_template, request, redirect, make_response
 from flask_socketio import SocketIO, emit, join_room
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import StaticPool
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 import os.path
+import greenlet
 from typing import Dict, List
 import random
+from dataclasses import replace
 
-from ..common.sql import Base
+from ..common.sql import upgrade_schema
 from ..common import Parameters, MovePacket, tile_to_emoji, ErrorPacket, WinPacket, JoinResponsePacket, JoinPacket, ParametersPacket, ViewPacket, LEMException, Tile, GameUUID, PlayerUUID, PlayerType, Emojis
+from ..common.codec import JSON, codecs, negotiate, dumps, loads
 from .config import ServerConfig
-from .handler import ServerHandler
+from .handler import ServerHandler, OPEN_GAMES_LIMIT, PAGE_SIZE, BULK_GAMES_LIMIT
+from .registry import GameRegistry, LiveGame
+from .timer import TurnScheduler
+from .persistence import WriteBehind
+from .metrics import PoolMetrics, MeteredQueuePool
+from .cache import RenderCache, make_etag, IMMUTABLE_MAX_AGE
+from .spectators import SpectatorBroadcaster, spectator_room
 
 class Server:
     _config: ServerConfig
@@ -23,10 +32,18 @@ class Server:
 
     def __get_dataclass(self, dataclass: any, data: any):
         try:
-            return dataclass.from_dict(data)
+            return loads(dataclass, data)
         except Exception as err:
             raise LEMException(str(err))
 
+    def __configure_connection(self, connection: any, record: any):
+        cursor = connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={self._config.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={self._config.synchronous}")
+        cursor.execute(f"PRAGMA cache_size={int(self._config.cache_size)}")
+        cursor.execute(f"PRAGMA mmap_size={int(self._config.mmap_size)}")
+        cursor.close()
+
     def run(self):
         if self._config.debug:
             engine = create_engine(
@@ -38,9 +55,25 @@ class Server:
             engine = create_engine(
                 f'sqlite:///{self._config.db}',
                 connect_args={"check_same_thread": False},
+                poolclass=MeteredQueuePool,
+                pool_size=self._config.pool_size,
+                max_overflow=self._config.max_overflow,
+                pool_timeout=self._config.pool_timeout,
+                pool_pre_ping=True
             )
-        Base.metadata.create_all(engine)
+        event.listen(engine, "connect", self.__configure_connection)
+        upgrade_schema(engine)
         SessionMaker = sessionmaker(bind=engine)
+        Session = scoped_session(SessionMaker, scopefunc=greenlet.getcurrent)
+        metrics = getattr(engine.pool, "metrics", PoolMetrics())
+
+        registry = GameRegistry()
+        writer = WriteBehind(session_maker=SessionMaker, registry=registry) if self._config.write_behind else None
+
+        scheduler = None
+
+        def create_handler() -> ServerHandler:
+            return ServerHandler(session=Session(), registry=registry, writer=writer, scheduler=scheduler)
 
         app = Flask(
             __name__,
@@ -49,10 +82,70 @@ class Server:
             template_folder=os.path.join(os.path.dirname(__file__), "../web/templates")
         )
         socketio = SocketIO(app)
+        render_cache = RenderCache(max_size=self._config.render_cache_size)
+        spectators = SpectatorBroadcaster(socketio, snapshot=ServerHandler.get_snapshot_packet, max_fps=self._config.spectator_fps)
+
+        def lean_room(game_id: int, codec: str = JSON) -> str:
+            return f"{game_id}/lean" if codec == JSON else f"{game_id}/lean/{codec}"
+
+        def broadcast(event: str, data: any, game_id: int):
+            socketio.emit(event, data, to=game_id)
+
+            for codec in codecs():
+                socketio.emit(event, data, to=lean_room(game_id, codec))
+
+            spectators.push(game_id, event, data)
+
+        def broadcast_lean(event: str, packet: any, game_id: int):
+            for codec in codecs():
+                socketio.emit(event, dumps(packet, codec), to=lean_room(game_id, codec))
+
+        def broadcast_turn(handler: ServerHandler, game: LiveGame):
+            render_cache.invalidate(game.id, "board")
+
+            if game.complete:
+                packet = WinPacket(
+                    ranks = game.ranks
+                )
+
+                broadcast("win", packet.to_dict(), game.id)
+
+            if not self._config.delta_broadcasts:
+                socketio.emit("play", handler.get_snapshot_packet(game=game).to_dict(), to=game.id)
+                broadcast_lean("play", handler.get_lean_snapshot_packet(game=game), game.id)
+            elif handler.delta is not None:
+                socketio.emit("delta", handler.delta.to_dict(), to=game.id)
+                broadcast_lean("delta", replace(handler.delta, emoji=None), game.id)
+
+            if handler.delta is not None or not self._config.delta_broadcasts:
+                spectators.publish(game)
+
+        def expire_turn(game_id: int, seq: int):
+            handler = create_handler()
+
+            try:
+                session = handler.expire_turn(game_id=game_id, seq=seq)
+
+                if session is None:
+                    return
+
+                socketio.emit("error", ErrorPacket(error="Too slow.").to_dict(), to=session.socket_id)
+                broadcast_turn(handler, session.game)
+            finally:
+                Session.remove()
+
+        if self._config.turn_timer:
+            scheduler = TurnScheduler(socketio, callback=expire_turn)
+            create_handler().arm_active_games()
+            Session.remove()
 
         @app.before_request
         def before_request():
-            request.handler = ServerHandler(session=SessionMaker())
+            request.handler = create_handler()
+
+        @app.teardown_request
+        def teardown_request(err):
+            Session.remove()
 
         @app.route('/')
         def index():
@@ -60,18 +153,66 @@ class Server:
                 board=self.__random_board(10)
             )
 
+        def render_board(game: LiveGame) -> str:
+            return render_cache.get_or_render("board", game.id, game.seq, lambda: render_template("board.html", board=game.pretty_board))
+
+        def live_etag(game: LiveGame) -> str:
+            return f"{game.id}.{game.seq}.{game.player_count}"
+
+        def view_response(body: str, etag: str, immutable: bool):
+            response = make_response(body)
+            response.set_etag(etag)
+
+            if immutable:
+                response.cache_control.public = True
+                response.cache_control.max_age = IMMUTABLE_MAX_AGE
+                response.cache_control.immutable = True
+            else:
+                response.cache_control.no_cache = True
+
+            return response.make_conditional(request)
+
         @app.route('/view/<game_id>')
         def view_game(game_id: str):
             try:
+                if not game_id.isdigit():
+                    raise LEMException("Game not found.")
+
+                cached = render_cache.get("view", game_id, "complete")
+                if cached is not None:
+                    return view_response(*cached, immutable=True)
+
+                live_game = registry.get(game_id)
+                if live_game is not None and live_etag(live_game) in request.if_none_match:
+                    return view_response("", live_etag(live_game), immutable=False)
+
                 game = request.handler.get_game(game_id=game_id)
 
                 if not game:
                     raise LEMException("Game not found.")
 
-                return render_template('view.html',
+                if game.complete:
+                    body = render_template('view.html',
+                        game=game,
+                        board_html=render_template("board.html", board=game.pretty_board),
+                        emojis=Emojis
+                    )
+                    etag = make_etag(body)
+                    render_cache.put("view", game.id, "complete", (body, etag))
+
+                    return view_response(body, etag, immutable=True)
+
+                live_game = request.handler.get_live_game(game_id=game.id, register=False)
+
+                with live_game.lock:
+                    etag = live_etag(live_game)
+                    board_html = render_board(live_game)
+
+                return view_response(render_template('view.html',
                     game=game,
+                    board_html=board_html,
                     emojis=Emojis
-                )
+                ), etag, immutable=False)
             except LEMException:
                 return redirect('/')
 
@@ -108,19 +249,35 @@ class Server:
 
         @app.route('/games', methods=['GET'])
         def games_list():
+            active_after = request.args.get("active_after", None, type=int)
+            completed_after = request.args.get("completed_after", None, type=int)
+
+            active_games = request.handler.get_active_games(after=active_after)
+            completed_games = request.handler.get_completed_games(after=completed_after)
+
             return render_template("games.html", 
-                active_games=request.handler.get_active_games(), 
-                completed_games=request.handler.get_completed_games(),
+                active_games=active_games, 
+                completed_games=completed_games,
+                active_after=active_after,
+                completed_after=completed_after,
+                active_next=active_games[-1].id if len(active_games) == PAGE_SIZE else None,
+                completed_next=completed_games[-1].id if len(completed_games) == PAGE_SIZE else None,
                 emojis=Emojis
             )
 
         @app.route('/player/<player_id>', methods=['GET'])
         def player_profile(player_id: str):
             try:
+                after = request.args.get("after", None, type=int)
                 player = request.handler.get_player(player_id=player_id)
+                sessions = request.handler.get_player_sessions(player_id=player.id, after=after)
 
                 return render_template("player.html",
                     player=player,
+                    record=player.record,
+                    sessions=sessions,
+                    after=after,
+                    next=sessions[-1].game_id if len(sessions) == PAGE_SIZE else None,
                     emojis=Emojis
                 )
             except:
@@ -128,21 +285,40 @@ class Server:
 
         @app.route('/leaderboard', methods=['GET'])
         def leaderboard():
+            after_score = request.args.get("after_score", None, type=int)
+            after_player = request.args.get("after_player", None, type=int)
+            offset = max(request.args.get("offset", 0, type=int), 0)
+
+            after = (after_score, after_player) if after_score is not None and after_player is not None else None
+            scores = request.handler.get_leaderboard(after=after)
+
             return render_template("leaderboard.html",
-                players=list(sorted(request.handler.get_players(), key=lambda player: player.score, reverse=True))
+                scores=scores,
+                after=after,
+                offset=offset if after is not None else 0,
+                next=(scores[-1].score, scores[-1].player_id) if len(scores) == PAGE_SIZE else None
+            )
+
+        def open_games_page(player_name: str = None):
+            limit = request.args.get("limit", OPEN_GAMES_LIMIT, type=int)
+            open_games = request.handler.get_open_games(
+                player_name=player_name,
+                after=request.args.get("after", None, type=int),
+                limit=limit
             )
 
-        @app.route('/api/games', methods=['GET'])
-        def games_api_list_any():
             return {
-                "open_games": [game.id for game in request.handler.get_open_games()]
+                "open_games": open_games,
+                "next": open_games[-1] if limit and len(open_games) == limit else None
             }
 
+        @app.route('/api/games', methods=['GET'])
+        def games_api_list_any():
+            return open_games_page()
+
         @app.route('/api/games/<player_name>', methods=['GET'])
         def games_api_list(player_name: str):
-            return {
-                "open_games": [game.id for game in request.handler.get_open_games(player_name=player_name)]
-            }
+            return open_games_page(player_name=player_name)
 
         @app.route('/api/new', methods=['POST'])
         def games_new():
@@ -162,9 +338,36 @@ class Server:
             finally:
                 pass
 
+        @app.route('/api/new/bulk', methods=['POST'])
+        def games_new_bulk():
+            try:
+                data = request.get_json()
+
+                if isinstance(data, list):
+                    parameters = [self.__get_dataclass(Parameters, d) for d in data]
+                elif isinstance(data, dict) and "parameters" in data:
+                    count = int(data.get("count", 1))
+
+                    if count < 1:
+                        raise LEMException("Cannot create fewer than 1 game.")
+                    if count > BULK_GAMES_LIMIT:
+                        raise LEMException(f"Cannot create more than {BULK_GAMES_LIMIT} games at once.")
+
+                    parameters = [self.__get_dataclass(Parameters, data["parameters"])] * count
+                else:
+                    return {"error": "Expected a list of parameters or parameters with a count."}
+
+                return {"game_ids": request.handler.create_games(parameters=parameters)}
+            except (LEMException, ValueError) as err:
+                return {"error": str(err)}
+
+        @app.route('/api/metrics/pool', methods=['GET'])
+        def pool_metrics():
+            return metrics.to_dict(engine.pool)
+
         @socketio.on("view")
         def view(data):
-            request.handler = ServerHandler(session=SessionMaker())
+            request.handler = create_handler()
 
             packet = self.__get_dataclass(ViewPacket, data)
 
@@ -173,11 +376,31 @@ class Server:
             if not game:
                 raise LEMException("No game with game_id.")
 
-            join_room(game.id)
+            join_room(spectator_room(game.id))
+
+            live_game = request.handler.get_live_game(game_id=game.id, register=False)
+            if live_game.started:
+                emit("play", request.handler.get_snapshot_packet(game=live_game).to_dict())
+
+        @socketio.on("snapshot")
+        def snapshot(data):
+            request.handler = create_handler()
+
+            packet = self.__get_dataclass(ViewPacket, data)
+
+            game = request.handler.get_live_game(game_id=packet.game_id, register=False)
+
+            if not game:
+                raise LEMException("No game with game_id.")
+
+            if packet.lean:
+                emit("play", dumps(request.handler.get_lean_snapshot_packet(game=game), negotiate(packet.codec)))
+            else:
+                emit("play", request.handler.get_snapshot_packet(game=game).to_dict())
 
         @socketio.on("join")
         def join(data):
-            request.handler = ServerHandler(session=SessionMaker())
+            request.handler = create_handler()
 
             packet = self.__get_dataclass(JoinPacket, data)
 
@@ -206,7 +429,8 @@ class Server:
                 except:
                     raise LEMException("Unable to make new session.")
 
-            join_room(game.id)
+            codec = negotiate(packet.codec) if packet.lean else JSON
+            join_room(lean_room(game.id, codec) if packet.lean else game.id)
 
             join_packet = JoinResponsePacket(
                 socket_id=request.sid,
@@ -214,40 +438,40 @@ class Server:
                 player_name=player.name,
                 player_type=session.player_type,
                 tile=session.tile,
-                tile_emoji=tile_to_emoji(session.tile)
+                tile_emoji=tile_to_emoji(session.tile),
+                codec=codec
             )
 
-            emit("join", join_packet.to_dict(), to=game.id)
+            broadcast("join", join_packet.to_dict(), game.id)
+
+            live_game = request.handler.get_live_game(game_id=game.id)
+            if live_game.started:
+                if live_game.last_time is None:
+                    request.handler.arm_turn(live_game)
 
-            if game.started:
-                emit("play", request.handler.get_play_packet(socket_id=request.sid).to_dict(), to=game.id)
+                emit("play", request.handler.get_snapshot_packet(game=live_game).to_dict(), to=game.id)
+                broadcast_lean("play", request.handler.get_lean_snapshot_packet(game=live_game), game.id)
+                spectators.publish(live_game)
 
         @socketio.on("play")
         def play(data):
-            request.handler = ServerHandler(session=SessionMaker())
+            request.handler = create_handler()
 
             packet = self.__get_dataclass(MovePacket, data)
 
             try:
                 session = request.handler.play(socket_id=request.sid, packet=packet)
             finally:
-                session = request.handler.get_session(socket_id=request.sid)
+                session = request.handler.get_live_session(socket_id=request.sid)
 
                 if not session:
                     return
 
-                if session.game.complete:
-                    packet = WinPacket(
-                        ranks = session.game.ranks
-                    )
-
-                    emit("win", packet.to_dict(), to=session.game.id)
-
-                emit("play", request.handler.get_play_packet(socket_id=request.sid).to_dict(), to=session.game.id)
+                broadcast_turn(request.handler, session.game)
 
         @socketio.on("parameters")
         def parameters(data):
-            request.handler = ServerHandler(session=SessionMaker())
+            request.handler = create_handler()
 
             packet = self.__get_dataclass(ParametersPacket, data)
             game = request.handler.get_game(game_id=packet.game_id)
@@ -267,4 +491,13 @@ class Server:
                 )
                 emit("error", packet.to_dict())
 
-        socketio.run(app, host="0.0.0.0", debug=self._config.debug, port=self._config.port)
+        try:
+            socketio.run(app, host="0.0.0.0", debug=self._config.debug, port=self._config.port)
+        finally:
+            spectators.close()
+            if scheduler is not None:
+                scheduler.close()
+            if writer is not None:
+                writer.close()
+            Session.remove()
+            engine.dispose()
@@ -0,0 +1,81 @@
+from typing import Callable, Dict, List, Tuple
+import logging
+import threading
+
+from .registry import LiveGame
+
+logger = logging.getLogger(__name__)
+
+def spectator_room(game_id: int) -> str:
+    return f"{game_id}/spectators"
+
+class SpectatorBroadcaster:
+    __socketio: any
+    __snapshot: Callable[[LiveGame], any]
+    __interval: float
+    __lock: threading.Lock
+    __games: Dict[int, LiveGame]
+    __events: Dict[int, List[Tuple[str, any]]]
+    __running: bool
+    frames: int
+
+    def __init__(self, socketio: any, snapshot: Callable[[LiveGame], any], max_fps: float = 10):
+        self.__socketio = socketio
+        self.__snapshot = snapshot
+        self.__interval = 1 / max_fps if max_fps > 0 else 0
+        self.__lock = threading.Lock()
+        self.__games = {}
+        self.__events = {}
+        self.__running = True
+        self.frames = 0
+
+        if self.__interval > 0:
+            socketio.start_background_task(self.__run)
+
+    def publish(self, game: LiveGame):
+        with self.__lock:
+            self.__games[game.id] = game
+
+        if self.__interval == 0:
+            self.flush()
+
+    def push(self, game_id: int, event: str, data: any):
+        with self.__lock:
+            self.__events.setdefault(int(game_id), []).append((event, data))
+
+        if self.__interval == 0:
+            self.flush()
+
+    def flush(self):
+        with self.__lock:
+            games, self.__games = self.__games, {}
+            events, self.__events = self.__events, {}
+
+        for game_id in set(games) | set(events):
+            room = spectator_room(game_id)
+
+            for event, data in events.get(game_id, []):
+                self.__socketio.emit(event, data, to=room)
+
+            if game_id in games:
+                game = games[game_id]
+
+                with game.lock:
+                    packet = self.__snapshot(game)
+
+                self.__socketio.emit("play", packet.to_dict(), to=room)
+
+            self.frames += 1
+
+    def __run(self):
+        while self.__running:
+            self.__socketio.sleep(self.__interval)
+
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Spectator broadcast failed.")
+
+    def close(self):
+        self.__running = False
+        self.flush()
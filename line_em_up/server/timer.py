@@ -0,0 +1,73 @@
+from typing import Callable, Dict, List, Tuple
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class TurnScheduler:
+    __socketio: any
+    __callback: Callable[[int, int], None]
+    __heap: List[Tuple[float, int, int]]
+    __armed: Dict[int, int]
+    __lock: threading.Lock
+    __interval: float
+    __running: bool
+
+    def __init__(self, socketio: any, callback: Callable[[int, int], None], interval: float = 0.1):
+        self.__socketio = socketio
+        self.__callback = callback
+        self.__heap = []
+        self.__armed = {}
+        self.__lock = threading.Lock()
+        self.__interval = interval
+        self.__running = True
+
+        socketio.start_background_task(self.__run)
+
+    def arm(self, game_id: int, seq: int, deadline: float):
+        with self.__lock:
+            self.__armed[game_id] = seq
+            heapq.heappush(self.__heap, (deadline, game_id, seq))
+
+    def disarm(self, game_id: int):
+        with self.__lock:
+            self.__armed.pop(game_id, None)
+
+    def __pop_expired(self) -> List[Tuple[int, int]]:
+        expired = []
+        now = time.time()
+
+        with self.__lock:
+            while self.__heap and self.__heap[0][0] <= now:
+                _, game_id, seq = heapq.heappop(self.__heap)
+
+                if self.__armed.get(game_id) == seq:
+                    del self.__armed[game_id]
+                    expired.append((game_id, seq))
+
+        return expired
+
+    def __wait_time(self) -> float:
+        with self.__lock:
+            if not self.__heap:
+                return self.__interval
+
+            return min(max(self.__heap[0][0] - time.time(), 0), self.__interval)
+
+    def __run(self):
+        while self.__running:
+            for game_id, seq in self.__pop_expired():
+                try:
+                    self.__callback(game_id, seq)
+                except Exception:
+                    logger.exception("Turn timer failed for game %s.", game_id)
+
+            self.__socketio.sleep(self.__wait_time())
+
+    def close(self):
+        self.__running = False
+
+    def __len__(self) -> int:
+        return len(self.__armed)
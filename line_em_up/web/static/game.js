@@ -1,4 +1,11 @@
-function update_board(board) {
+let BOARD_SEQ = null;
+
+function update_board(board, seq) {
+    if(seq !== undefined) {
+        if(BOARD_SEQ !== null && seq < BOARD_SEQ) return false;
+        BOARD_SEQ = seq;
+    }
+
     for(let i = 0; i < board.length; i++) {
         for(let j = 0; j < board[i].length; j++) {
             let id = `game_board_${i}_${j}`;
@@ -7,6 +14,30 @@ function update_board(board) {
             td.innerHTML = board[i][j];
         }
     }
+
+    return true;
+}
+
+function request_snapshot() {
+    socket.emit("snapshot", { game_id: GAME_ID });
+}
+
+function apply_delta({ seq, move, emoji }) {
+    if(BOARD_SEQ === null || seq > BOARD_SEQ + 1) {
+        request_snapshot();
+        return false;
+    }
+
+    if(seq <= BOARD_SEQ) return false;
+
+    if(move) {
+        let [x, y] = move;
+        document.getElementById(`game_board_${y}_${x}`).innerHTML = emoji;
+    }
+
+    BOARD_SEQ = seq;
+
+    return true;
 }
 
 function set_message(text) {
@@ -13,20 +13,66 @@ def parse_args():
     client_parser.add_argument("client_type", choices=("ai", "human"), help="Client type to run as.")
     client_parser.add_argument("--game", help="Game UUID to connect to.", required=True)
     client_parser.add_argument("--name", help="Player name to connect with.", default=str(uuid.uuid4()))
+    client_parser.add_argument("--table-size", help="Transposition table bucket count.", type=int, default=2 ** 16)
+    client_parser.add_argument("--time-margin", help="Seconds of max time kept back for network latency.", type=float, default=0.5)
+    client_parser.add_argument("--workers", help="Search worker processes (1 searches on the client thread).", type=int, default=1)
+    client_parser.add_argument("--book-dir", help="Directory of opening books to play from.", default=None)
+    client_parser.add_argument("--codec", help="Packet encoding requested for AI clients (msgpack needs the msgpack package).", choices=("json", "msgpack"), default="json")
+    client_parser.add_argument("--node-times", help="Send every node time instead of a compact histogram.", action="store_true")
 
     server_parser = type_parser.add_parser("server")
 
     server_parser.add_argument("--debug", help="Set server in debug mode.", action="store_true")
     server_parser.add_argument("--port", help="Specify port to run on.", type=int, default=5000)
     server_parser.add_argument("--db", help="SQLite database file.", default="./data.db")
+    server_parser.add_argument("--journal-mode", help="SQLite journal mode.", choices=("delete", "truncate", "persist", "memory", "wal", "off"), default="wal")
+    server_parser.add_argument("--synchronous", help="SQLite synchronous level.", choices=("off", "normal", "full", "extra"), default="normal")
+    server_parser.add_argument("--cache-size", help="SQLite page cache size (pages, or KiB if negative).", type=int, default=-65536)
+    server_parser.add_argument("--mmap-size", help="SQLite memory-mapped I/O size in bytes.", type=int, default=268435456)
+    server_parser.add_argument("--full-broadcasts", help="Broadcast the full board after every move instead of deltas.", action="store_true")
+    server_parser.add_argument("--no-turn-timer", help="Only check for slow AI moves when the move arrives.", action="store_true")
+    server_parser.add_argument("--sync-writes", help="Commit every move before responding instead of writing behind.", action="store_true")
+    server_parser.add_argument("--pool-size", help="Database connections kept open in the pool.", type=int, default=5)
+    server_parser.add_argument("--max-overflow", help="Extra connections allowed beyond the pool size under load.", type=int, default=10)
+    server_parser.add_argument("--pool-timeout", help="Seconds to wait for a pooled connection before failing.", type=float, default=30)
+    server_parser.add_argument("--render-cache-size", help="Rendered game pages and boards kept in memory (0 disables).", type=int, default=1024)
+    server_parser.add_argument("--spectator-fps", help="Max board updates per second sent to spectators (0 sends every move).", type=float, default=10)
+
+    scores_parser = type_parser.add_parser("scores")
+
+    scores_parser.add_argument("--db", help="SQLite database file to rebuild player scores for.", default="./data.db")
+
+    archive_parser = type_parser.add_parser("archive")
+
+    archive_parser.add_argument("--db", help="SQLite database file to archive completed games in.", default="./data.db")
 
     pool_parser = type_parser.add_parser("pool")
 
     pool_parser.add_argument("--name", help="AI name to connect with.", default=str(uuid.uuid4()))
     pool_parser.add_argument("--size", help="AI pool size.", type=int, default=1)
+    pool_parser.add_argument("--workers", help="Search worker processes per AI.", type=int, default=1)
+    pool_parser.add_argument("--book-dir", help="Directory of opening books to play from.", default=None)
+    pool_parser.add_argument("--codec", help="Packet encoding requested by the pooled AIs.", choices=("json", "msgpack"), default="json")
+
+    book_parser = type_parser.add_parser("book")
+
+    book_parser.add_argument("--size", help="Board size.", type=int, required=True)
+    book_parser.add_argument("--line-up", help="Line up size.", type=int, required=True)
+    book_parser.add_argument("--blocks", help="Block positions, e.g. \"(0,0)(0,3)\".", default="")
+    book_parser.add_argument("--players", help="Player count.", type=int, default=2)
+    book_parser.add_argument("--heuristics", help="Heuristic per player.", nargs="+", default=None)
+    book_parser.add_argument("--algorithm", help="Search algorithm.", choices=("minimax", "alphabeta"), default="alphabeta")
+    book_parser.add_argument("--depth", help="Search depth per position (0 solves to the end).", type=int, default=0)
+    book_parser.add_argument("--plies", help="Number of opening plies to store.", type=int, default=4)
+    book_parser.add_argument("--dir", help="Directory to write the book to.", default="./books/")
 
     copy_parser = type_parser.add_parser("copy")
 
+    bench_parser = type_parser.add_parser("bench")
+
+    bench_parser.add_argument("--iterations", help="Encode/decode repetitions per packet type.", type=int, default=10000)
+    bench_parser.add_argument("--size", help="Board size of the sample game.", type=int, default=8)
+
     log_parser = type_parser.add_parser("log")
 
     log_parser.add_argument("--db", help="SQLite database file.", default="./data.db")
@@ -52,6 +98,32 @@ def main():
         server_main(ServerConfig(
             debug=args.debug,
             port=args.port,
+            db=os.path.abspath(args.db),
+            write_behind=not args.sync_writes,
+            journal_mode=args.journal_mode,
+            synchronous=args.synchronous,
+            cache_size=args.cache_size,
+            mmap_size=args.mmap_size,
+            delta_broadcasts=not args.full_broadcasts,
+            turn_timer=not args.no_turn_timer,
+            pool_size=args.pool_size,
+            max_overflow=args.max_overflow,
+            pool_timeout=args.pool_timeout,
+            render_cache_size=args.render_cache_size,
+            spectator_fps=args.spectator_fps
+        ))
+    elif args.type == "scores":
+        from line_em_up.server import scores_main, ScoresConfig
+        import os.path
+
+        scores_main(ScoresConfig(
+            db=os.path.abspath(args.db)
+        ))
+    elif args.type == "archive":
+        from line_em_up.server import archive_main, ArchiveConfig
+        import os.path
+
+        archive_main(ArchiveConfig(
             db=os.path.abspath(args.db)
         ))
     elif args.type == "client":
@@ -62,7 +134,13 @@ def main():
             url=os.environ["URL"],
             player_name=args.name,
             player_type=PlayerType(args.client_type),
-            game_id=args.game
+            game_id=args.game,
+            table_size=args.table_size,
+            time_margin=args.time_margin,
+            workers=args.workers,
+            book_dir=args.book_dir,
+            compact_statistics=not args.node_times,
+            codec=args.codec
         ))
     elif args.type == "pool":
         from line_em_up.client import pool_main, PoolConfig
@@ -70,7 +148,24 @@ def main():
         pool_main(PoolConfig(
             url=os.environ["URL"],
             player_name=args.name,
-            pool_count=args.size
+            pool_count=args.size,
+            workers=args.workers,
+            book_dir=args.book_dir,
+            codec=args.codec
+        ))
+    elif args.type == "book":
+        from line_em_up.client import book_main, BookConfig
+
+        book_main(BookConfig(
+            board_size=args.size,
+            line_up_size=args.line_up,
+            blocks=args.blocks,
+            player_count=args.players,
+            heuristics=args.heuristics or ["1"] * args.players,
+            algorithm=args.algorithm,
+            depth=args.depth,
+            plies=args.plies,
+            book_dir=args.dir
         ))
     elif args.type == "copy":
         import shutil
@@ -81,6 +176,13 @@ def main():
             shutil.rmtree(target)
 
         shutil.copytree(os.environ["AI_PATH"], target)
+    elif args.type == "bench":
+        from line_em_up.bench import bench_main, BenchConfig
+
+        bench_main(BenchConfig(
+            iterations=args.iterations,
+            board_size=args.size
+        ))
     elif args.type == "log":
         from line_em_up.log import log_main, LogConfig
         import os.path